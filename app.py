@@ -1,52 +1,255 @@
+import hashlib
+import heapq
+import io
+import json
+import logging
+import mimetypes
 import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.parse import quote
+
+import click
 
 from flask import (
     Flask,
+    g,
+    has_request_context,
     render_template,
     request,
+    url_for,
     send_from_directory,
     abort,
     jsonify,
 )
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import or_, func
+from markupsafe import Markup, escape
+from sqlalchemy import (
+    or_,
+    text,
+    bindparam,
+    event,
+    func,
+    insert,
+    select,
+    literal,
+    tuple_,
+    type_coerce,
+    inspect as sa_inspect,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from thefuzz import process, fuzz
+from thefuzz.utils import full_process
+from werkzeug.security import safe_join
+from rapidfuzz import process as rf_process, fuzz as rf_fuzz
+
+try:
+    import numpy as np  # opcional: habilita process.cdist multihilo
+except ImportError:
+    np = None
+
+try:
+    from pypdf import PdfReader  # opcional: solo lo usa el comando extract-docs
+except ImportError:
+    PdfReader = None
+
+try:
+    # opcional: modelo de embeddings local para la búsqueda semántica
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import hnswlib  # opcional: índice ANN; sin él se compara contra toda la matriz
+except ImportError:
+    hnswlib = None
+
+try:
+    import waitress  # opcional: servidor de producción (flask serve / python app.py)
+except ImportError:
+    waitress = None
 
 app = Flask(__name__)
 
 # --- Config -------------------------------------------------
 
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///cases.db"
+# CASES_DATABASE_URI permite apuntar a otra base (p. ej. la de benchmark.py)
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+    "CASES_DATABASE_URI", "sqlite:///cases.db"
+)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Pool de conexiones para servidores con varios hilos (waitress, gunicorn
+# --threads). Con WAL las lecturas no esperan a las escrituras, así que cada
+# hilo puede tener su conexión; "timeout" (segundos) es lo que una escritura
+# espera el lock de otra antes de fallar con "database is locked". Una base
+# en memoria usa una única conexión compartida (StaticPool) y no lleva pool
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+if make_url(app.config["SQLALCHEMY_DATABASE_URI"]).database not in (None, "", ":memory:"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update(
+        pool_size=int(os.environ.get("CASES_DB_POOL_SIZE", 10)),
+        max_overflow=int(os.environ.get("CASES_DB_MAX_OVERFLOW", 20)),
+        pool_timeout=30,
+    )
+
+# PRAGMAs que se aplican a cada conexión SQLite nueva: WAL (lectores
+# concurrentes con un escritor), synchronous=NORMAL (seguro con WAL, sin
+# fsync por commit), caché de páginas de 64 MiB (valor negativo = KiB),
+# lecturas por mmap de hasta 256 MiB y tablas temporales en memoria
+app.config["SQLITE_PRAGMAS"] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+
 # Carpeta donde estarán los PDFs u otros documentos
 app.config["CASE_DOCS_DIR"] = os.path.join(app.root_path, "documents")
 
+# Segundos que el navegador puede reutilizar un laudo sin revalidarlo; después
+# revalida con If-None-Match / If-Modified-Since y recibe un 304 si no cambió
+app.config["CASE_DOCS_MAX_AGE"] = 86400
+
+# Casos cuyo nombre de documento recuerda download_case (LRU, ver DocumentCache)
+app.config["DOCUMENT_CACHE_SIZE"] = 10000
+
+# Detrás de nginx: con un prefijo (p. ej. "/_laudos/", una location internal
+# con alias a CASE_DOCS_DIR) la descarga solo responde X-Accel-Redirect y
+# nginx envía el archivo con sendfile, Range y 304 incluidos, sin ocupar un
+# hilo de la aplicación. Para Apache / lighttpd está USE_X_SENDFILE de Flask
+app.config["CASE_DOCS_ACCEL_PREFIX"] = None
+
+# Pesos BM25 por columna del índice FTS5, en el orden de FTS_COLUMNS
+# (title, content, radicado, arbiter, keywords, industry, tags)
+app.config["FTS_BM25_WEIGHTS"] = (5.0, 1.0, 10.0, 2.0, 3.0, 2.0, 3.0)
+
+# Búsqueda fuzzy: cuántos candidatos preseleccionados por trigramas se puntúan
+# con WRatio, y a partir de qué fracción del corpus un trigrama se considera
+# demasiado común para discriminar (se ignora, como una stopword)
+app.config["FUZZY_CANDIDATE_LIMIT"] = 300
+app.config["FUZZY_MAX_TRIGRAM_DF"] = 0.25
+
+# Motor de puntuación fuzzy ("rapidfuzz" en lote o "thefuzz" uno a uno),
+# cuántos resultados fuzzy se conservan y con qué puntaje mínimo (0-100).
+# FUZZY_WORKERS se pasa a rapidfuzz.process.cdist (-1 = todos los núcleos).
+app.config["FUZZY_SCORER"] = "rapidfuzz"
+app.config["FUZZY_LIMIT"] = 20
+app.config["FUZZY_MIN_SCORE"] = 50
+app.config["FUZZY_WORKERS"] = -1
+
+# Caché de resultados de búsqueda: cuántas combinaciones de filtros guarda
+# (LRU) y cuántos segundos vale cada una como máximo. SEARCH_CACHE_MAX_IDS
+# acota además la suma de ids (y puntajes) guardados entre todas: una q que
+# coincide con todo el corpus pesa tanto como miles de búsquedas puntuales
+app.config["SEARCH_CACHE_SIZE"] = 256
+app.config["SEARCH_CACHE_TTL"] = 300
+app.config["SEARCH_CACHE_MAX_IDS"] = 1_000_000
+
+# Caché de la página de búsqueda ya renderizada (entradas y TTL en segundos).
+# PAGE_CACHE_MAX_AGE es el max-age para navegador/proxy; con 0 revalidan
+# siempre con el ETag (304 si no hubo escrituras)
+app.config["PAGE_CACHE_SIZE"] = 64
+app.config["PAGE_CACHE_TTL"] = 300
+app.config["PAGE_CACHE_MAX_AGE"] = 0
+
+# Instrumentación opt-in de / y /api/search: tiempos por etapa y de SQL en
+# la cabecera Server-Timing y en /metrics; las búsquedas que tardan más de
+# SLOW_SEARCH_MS se registran en el log con sus parámetros normalizados
+app.config["SEARCH_TIMING"] = False
+app.config["SLOW_SEARCH_MS"] = 500
+
+# Búsqueda semántica opcional (requiere numpy y sentence-transformers;
+# hnswlib para el índice aproximado). `flask embed-cases` codifica el resumen
+# de cada caso y las páginas de sus PDF en fragmentos de SEMANTIC_CHUNK_CHARS
+# y los guarda en SEMANTIC_INDEX_DIR. Con SEMANTIC_SEARCH activo, los
+# SEMANTIC_LIMIT casos más cercanos a q (similitud coseno >= SEMANTIC_MIN_SCORE)
+# se fusionan con los resultados exactos y fuzzy por reciprocal rank fusion
+app.config["SEMANTIC_SEARCH"] = False
+app.config["SEMANTIC_MODEL"] = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+app.config["SEMANTIC_INDEX_DIR"] = os.path.join(app.instance_path, "semantic")
+app.config["SEMANTIC_CHUNK_CHARS"] = 1000
+app.config["SEMANTIC_BATCH_SIZE"] = 64
+app.config["SEMANTIC_LIMIT"] = 50
+app.config["SEMANTIC_MIN_SCORE"] = 0.35
+
+# Constante k de reciprocal rank fusion: score = sum(1 / (k + posición))
+app.config["RRF_K"] = 60
+
+# Autocompletado (/api/suggest): sugerencias por respuesta y cuántas entradas
+# del índice de prefijos se revisan como máximo por consulta
+app.config["SUGGEST_LIMIT"] = 8
+app.config["SUGGEST_SCAN"] = 200
+
+# Casos por transacción en /api/cases/bulk
+app.config["BULK_CHUNK_SIZE"] = 1000
+
+# Servidor de producción (flask serve, o python app.py sin FLASK_DEBUG=1):
+# waitress con SERVER_THREADS hilos para la aplicación. Su bucle de E/S
+# asíncrono es el que escribe a los sockets, y los PDF se entregan vía
+# wsgi.file_wrapper (leídos del disco a medida que se envían): un cliente
+# lento ocupa un socket, no uno de los hilos que atienden búsquedas.
+# Conviene que SERVER_THREADS no supere el pool de conexiones a la base
+app.config["SERVER_HOST"] = os.environ.get("CASES_HOST", "0.0.0.0")
+app.config["SERVER_PORT"] = int(os.environ.get("CASES_PORT", 5000))
+app.config["SERVER_THREADS"] = int(os.environ.get("CASES_THREADS", 8))
+app.config["SERVER_CONNECTION_LIMIT"] = 1000
+
 db = SQLAlchemy(app)
 
+
+@event.listens_for(Engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplicar SQLITE_PRAGMAS al abrir cada conexión del pool."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in app.config["SQLITE_PRAGMAS"].items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
 # --- Models -------------------------------------------------
 
 case_tags = db.Table(
     "case_tags",
     db.Column("case_id", db.Integer, db.ForeignKey("case.id"), primary_key=True),
     db.Column("tag_id", db.Integer, db.ForeignKey("tag.id"), primary_key=True),
+    # La PK (case_id, tag_id) sirve para "tags de un caso"; este, para "casos de un tag"
+    db.Index("ix_case_tags_tag_id", "tag_id", "case_id"),
 )
 
 case_arbiters = db.Table(
     "case_arbiters",
     db.Column("case_id", db.Integer, db.ForeignKey("case.id"), primary_key=True),
     db.Column("arbiter_id", db.Integer, db.ForeignKey("arbiter.id"), primary_key=True),
+    db.Index("ix_case_arbiters_arbiter_id", "arbiter_id", "case_id"),
 )
 
 
 class Case(db.Model):
     __tablename__ = "case"
+    __table_args__ = (
+        # Cubre el SELECT DISTINCT industry de las facetas sin leer la tabla
+        db.Index("ix_case_industry_fecha", "industry", "fecha_laudo"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
-    # Campos principales
-    radicado = db.Column(db.String(50), nullable=False)
+    # Campos principales. El radicado identifica al caso (init_db lo usa
+    # como clave natural); su índice único también sirve al orden radicado_asc
+    radicado = db.Column(db.String(50), nullable=False, unique=True, index=True)
     fecha_laudo = db.Column(db.Date, nullable=True)
 
     title = db.Column(db.String(300), nullable=False)
@@ -64,20 +267,43 @@ class Case(db.Model):
     # Nombre de archivo del laudo (relativo a CASE_DOCS_DIR)
     doc_filename = db.Column(db.String(255), nullable=True)
 
+    # Huella (sha256) del dato de ejemplo con que se sembró; init_db la usa
+    # para no reescribir casos que no cambiaron. NULL en casos cargados por API
+    content_hash = db.Column(db.String(64), nullable=True)
+
+    # Copias normalizadas (minúsculas, sin tildes, espacios colapsados) que usa
+    # la búsqueda en vez de func.lower(); se llenan en before_insert/update
+    title_norm = db.Column(db.String(300), nullable=True, index=True)
+    content_norm = db.Column(db.Text, nullable=True)
+    radicado_norm = db.Column(db.String(50), nullable=True, index=True)
+    arbiter_norm = db.Column(db.String(200), nullable=True, index=True)
+    keywords_norm = db.Column(db.String(255), nullable=True)
+    industry_norm = db.Column(db.String(100), nullable=True, index=True)
+
+    # Carga perezosa: la lista de resultados no usa estas relaciones (ver
+    # load_results), así que no se traen en cada consulta de casos
     tags = db.relationship(
         "Tag",
         secondary=case_tags,
-        lazy="subquery",
+        lazy="select",
         backref=db.backref("cases", lazy=True),
     )
 
     arbiters = db.relationship(
         "Arbiter",
         secondary=case_arbiters,
-        lazy="subquery",
+        lazy="select",
         backref=db.backref("cases", lazy=True),
     )
 
+    # Campos con copia <campo>_norm
+    NORMALIZED_FIELDS = ("title", "content", "radicado", "arbiter", "keywords", "industry")
+
+    def refresh_normalized(self):
+        """Recalcular las columnas *_norm a partir de los campos originales."""
+        for field in self.NORMALIZED_FIELDS:
+            setattr(self, f"{field}_norm", normalize_text(getattr(self, field)))
+
 
 class Tag(db.Model):
     __tablename__ = "tag"
@@ -85,6 +311,12 @@ class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
 
+    # "pacto_arbitral" -> "pacto arbitral"
+    name_norm = db.Column(db.String(100), nullable=True, index=True)
+
+    def refresh_normalized(self):
+        self.name_norm = normalize_text(self.name)
+
 
 class Arbiter(db.Model):
     __tablename__ = "arbiter"
@@ -93,215 +325,2019 @@ class Arbiter(db.Model):
     name = db.Column(db.String(200), unique=True, nullable=False)
 
 
-# --- DB init / datos de ejemplo ------------------------------
+class CaseDocument(db.Model):
+    """Archivo del laudo ya extraído a CasePage (para no reprocesarlo)."""
 
-def init_db():
-    """Crear tablas y sembrar datos demo si están vacías."""
-    db.create_all()
+    __tablename__ = "case_document"
 
-    # Si ya hay casos, verificamos uno a uno para no duplicar (o podríamos borrar todo para dev)
-    # if Case.query.first():
-    #     return
+    case_id = db.Column(db.Integer, db.ForeignKey("case.id"), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    # os.stat del archivo al extraerlo: si no cambian, se salta
+    mtime = db.Column(db.Float, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    page_count = db.Column(db.Integer, nullable=False)
 
-    # Datos provenientes de tu JSON (adaptados a Python) + árbitro + keywords demo
-    cases_data = [
-        {
-            "industry": "Consumo / Servicios",
-            "radicado": "2024 A 0052",
-            "fecha_laudo": "2025-04-30",
-            "title": "Leonel Chica vs. Loyalty World S.A.S.",
-            "arbiter": "Árbitro único: Ana María López",
-            "keywords": "consumo dolo afiliacion credito",
-            "content": """En el plano procesal, el laudo analiza la existencia, validez y oponibilidad del pacto arbitral contenido en el Contrato de Afiliación No. MED1298, la jurisdicción y competencia del tribunal conforme a la Ley 1563 de 2012, así como la correcta integración del tribunal, la capacidad de las partes y el cumplimiento de los presupuestos procesales (demanda en forma, legitimación en la causa, integración del contradictorio y término del proceso). También se valora la inactividad de la parte convocada, que no contestó la demanda ni asistió a las audiencias, y las consecuencias probatorias de su incomparecencia y silencio frente a las afirmaciones de la parte convocante.
 
-En el plano sustancial, el tribunal estudia si procede declarar la nulidad relativa del contrato por dolo como vicio del consentimiento, a partir de la información engañosa y las maniobras desplegadas por los empleados de Loyalty World para inducir al demandante a suscribir un contrato de afiliación distinto a lo ofrecido verbalmente. Igualmente examina el eventual incumplimiento de los deberes de información consagrados en el Estatuto del Consumidor, la eficacia de la cláusula de permanencia mínima de cuatro años considerada como cláusula abusiva, y las consecuencias económicas derivadas del crédito de consumo gestionado con el Banco de Bogotá (cuotas, intereses, seguros y demás cargos) para efectos de la restitución de lo pagado y la indemnización de perjuicios.""",
-            "path": "2024 A 0052 30-04-2025.pdf",
-            "tags": [
-                "pacto_arbitral",
-                "competencia_tribunal",
-                "presupuestos_procesales",
-                "incomparecencia_demandado",
-                "nulidad_relativa_por_dolo",
-                "estatuto_consumidor",
-                "clausula_abusiva_permanencia_minima",
-                "informacion_al_consumidor",
-            ],
-        },
-        {
-            "industry": "Construcción",
-            "radicado": "2024 A 0036",
-            "fecha_laudo": "2025-02-17",
-            "title": "Construcciones A Plomo S.A.S. vs. Promotora & Constructora de Proyectos S.A.S.",
-            "arbiter": "Tribunal: Carlos Restrepo, Laura Vélez, Jorge Ramírez",
-            "keywords": "obra retenido pago indemnizacion",
-            "content": """En el plano procesal, el laudo examina la existencia y alcance del pacto arbitral contenido en los contratos de obra 024 – Portello y 033 – Oz, así como la competencia del tribunal bajo la Ley 1563 de 2012 y el Reglamento de Arbitraje Social de la Cámara de Comercio de Medellín. Se verifica el cumplimiento de los presupuestos procesales y materiales (capacidad, representación, demanda en forma, legitimación en la causa, interés para obrar, ausencia de cosa juzgada, caducidad, transacción o conciliación) y se analiza el trámite arbitral en rebeldía de la convocada, resaltando las consecuencias de la falta de contestación de la demanda y de la inactividad procesal de la demandada, en particular la confesión ficta prevista en el artículo 97 del Código General del Proceso, así como la fijación, cómputo y prórroga del término para proferir el laudo en un escenario de arbitraje social.
+class CasePage(db.Model):
+    """Texto de una página del PDF del laudo (page empieza en 1)."""
 
-En el plano sustancial, el tribunal estudia la relación contractual de obra civil entre las partes, centrando el problema jurídico en determinar si las sumas retenidas (el 10% del valor de los contratos) debían ser reembolsadas al contratista una vez terminadas las obras. A partir de la cláusula de forma de pago y del parágrafo sobre el retenido, se define la naturaleza de estas sumas como valores causados y reconocidos en actas de corte de obra y comunicaciones posteriores, sometidos a una condición temporal y a la elaboración de un memorando de entrega de retenido que el contratante nunca expidió dentro del plazo de un mes. El laudo concluye, con apoyo en el principio pacta sunt servanda y en la buena fe contractual, que la convocada incumplió la carga de emitir oportunamente dicho memorando y no probó la supuesta menor obra ejecutada ni el pago en exceso, por lo que debe reembolsar los valores retenidos debidamente indexados, rechazando la compensación unilateral pretendida por la contratante.""",
-            "path": "2024 A 0036 17-02-2025.pdf",
-            "tags": [
-                "pacto_arbitral",
-                "competencia_tribunal",
-                "rebeldia_demandado",
-                "confesion_ficta",
-                "contrato_de_obra",
-                "retenido_contractual",
-                "incumplimiento_pago",
-                "indexacion_monetaria",
-            ],
-        },
-        {
-            "industry": "Inmobiliario",
-            "radicado": "2024 A 0020",
-            "fecha_laudo": "2025-04-10",
-            "title": "INVERBETANCUR S.A.S. vs. Guillermo León Ruiz Tamayo y Altagracia del Socorro Gutiérrez Restrepo",
-            "arbiter": "Árbitro único: Beatriz Cárdenas",
-            "keywords": "arrendamiento estacion_servicio ambiente clausula_penal",
-            "content": """En el plano procesal, el laudo verifica de manera sistemática los presupuestos procesales de capacidad, demanda en forma, competencia del tribunal y legitimación en la causa para la demanda principal y la reconvención, a partir de la cláusula compromisoria del contrato de arrendamiento y su modificación en un trámite anterior. Se describen las actuaciones relevantes del trámite (admisión de la demanda, integración de la litis con la reconvención, decreto y práctica de pruebas, alegatos y saneamiento), se analiza la arbitrabilidad subjetiva y objetiva, y se estudia en detalle la excepción de cosa juzgada parcial frente a dos laudos arbitrales previos, contrastando identidad de partes, objeto y causa a la luz del artículo 302 del Código General del Proceso y la jurisprudencia de la Corte Suprema de Justicia.
+    __tablename__ = "case_page"
 
-En el plano sustancial, el tribunal centra la controversia en el contrato de arrendamiento del lote destinado a estación de servicio de combustible y en la imputación recíproca de incumplimientos: de un lado, la arrendataria sostiene que los arrendadores perturbaron el uso pacífico del inmueble mediante cambios de candados, restricciones de acceso a agua e instalaciones, quejas ante la autoridad ambiental y negativa de permisos para muestras, lo que habría generado pérdida de utilidades, costos adicionales y activación de la cláusula penal; del otro, los arrendadores alegan que la arrendataria incumplió obligaciones de mantenimiento, uso adecuado y obtención y conservación de permisos ambientales, causando sanciones y deterioro del bien, así como cánones dejados de pagar. El tribunal estudia el alcance de las obligaciones contractuales de cada parte, la carga probatoria sobre los hechos alegados, la procedencia de las indemnizaciones reclamadas y la aplicación de la cláusula penal y del juramento estimatorio en este contexto.""",
-            "path": "2024 A 0020 10-04-2025.pdf",
-            "tags": [
-                "clausula_compromisoria",
-                "competencia_tribunal",
-                "cosa_juzgada_parcial",
-                "demanda_de_reconvencion",
-                "contrato_de_arrendamiento",
-                "incumplimiento_contractual",
-                "obligaciones_ambientales",
-                "clausula_penal",
-            ],
-        },
-        {
-            "industry": "Construcción",
-            "radicado": "2024 A 0013",
-            "fecha_laudo": "2025-04-09",
-            "title": "CONSTRUCTIVAMENTE S.A.S. vs. Arturo García Isaac",
-            "arbiter": "Tribunal: Diana Ruiz, Camilo Salazar, Paula Hoyos",
-            "keywords": "administracion_delegada vivienda sobrecostos cuentas",
-            "content": """En el plano procesal, el laudo examina la existencia, alcance y posterior modificación de la cláusula compromisoria del contrato de administración delegada para el proyecto Green Mecano – Casa Arturo García, así como la correcta integración del tribunal y su competencia subjetiva y objetiva conforme a la Ley 1563 de 2012. Se estudia el trámite de la demanda principal y de la demanda de reconvención, la admisión de ambas, los recursos contra el auto admisorio, las excepciones de mérito, la audiencia de conciliación, la fijación y pago de gastos, la práctica de una amplia actividad probatoria (documentos, testimonios, interrogatorios, dictámenes periciales, ratificación de documentos y juramento estimatorio) y la posterior reconstrucción parcial del expediente por problemas en la plataforma MASCINFO. El tribunal también analiza el decreto de pruebas de oficio, la incidencia de la acción de tutela promovida contra dichas decisiones probatorias y concluye sobre la validez de la actuación y la concurrencia de los presupuestos procesales para dictar un laudo de mérito.
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.Integer, db.ForeignKey("case.id"), nullable=False, index=True)
+    page = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
 
-En el plano sustancial, el tribunal centra la controversia en el contrato de administración delegada de obra suscrito para la construcción de la vivienda Green Mecano – Casa Arturo García y en la imputación recíproca de incumplimientos: de un lado, CONSTRUCTIVAMENTE S.A.S. reclama el pago de un saldo importante por concepto de obra ejecutada y honorarios, apoyándose en los sobrecostos derivados de cambios de diseño, mayores cantidades de obra y un porcentaje de avance cercano al 95–99%; de otro lado, ARTURO GARCÍA ISAAC sostiene que cumplió integralmente sus obligaciones de pago, incluidos aportes al fondo rotatorio y suministro de materiales, y que fue el contratista quien abandonó la obra sin terminarla, sin rendir cuentas claras ni entregar información presupuestal y contable acorde con lo pactado. El laudo aborda la naturaleza jurídica del contrato de administración delegada, el régimen de riesgos y sobrecostos, el alcance de las obligaciones de rendición de cuentas y de entrega de la obra terminada y habitable, la procedencia de la excepción de contrato no cumplido y del cobro de mayores sumas, así como la legitimidad de la terminación anticipada y la prueba de los sobrecostos y perjuicios reclamados por el convocado en reconvención.""",
-            "path": "2024 A 0013 09-04-2025.pdf",
-            "tags": [
-                "clausula_compromisoria",
-                "competencia_tribunal",
-                "demanda_de_reconvencion",
-                "reconstruccion_expediente",
-                "contrato_administracion_delegada",
-                "contrato_de_obra",
-                "incumplimiento_contractual",
-                "sobrecostos_obra",
-            ],
-        },
-        {
-            "industry": "Seguros",
-            "radicado": "2024 A 0012",
-            "fecha_laudo": "2025-04-09",
-            "title": "C.I. HERMECO S.A. vs. Allianz Seguros S.A.",
-            "arbiter": "Tribunal: Jorge Nieto, Andrea Pérez, Luis Martínez",
-            "keywords": "seguro infidelidad estafa cobertura exclusiones",
-            "content": """En el plano procesal, el laudo constata el cumplimiento de los presupuestos procesales (demanda en forma, capacidad, representación y legitimación de las partes) y la validez del pacto arbitral contenido en la póliza de seguro de infidelidad y riesgos financieros, así como la correcta integración del tribunal y su competencia objetiva y subjetiva conforme a la Ley 1563 de 2012. Se reseñan las principales actuaciones: presentación y subsanación de la demanda, contestación con excepciones de mérito, objeciones al juramento estimatorio, reforma de la demanda y su contestación, fijación de gastos y honorarios, celebración de la primera audiencia de trámite donde se declara la competencia, decreto y práctica de pruebas documentales, testimoniales, interrogatorios y exhibición de documentos, así como las discusiones sobre la eventual renuencia en la exhibición y el alcance del artículo 267 del Código General del Proceso, concluyendo que no se configuran nulidades ni causales que impidan un pronunciamiento de mérito.
 
-En el plano sustancial, el tribunal examina el contrato de seguro de infidelidad y riesgos financieros (póliza No. 022729240/0) suscrito entre HERMECO y ALLIANZ, centrando la controversia en la ocurrencia del siniestro derivado de una estafa por suplantación de la representante legal de HERMECO y en la procedencia de la cobertura bajo el amparo de falsificación extendida. Se analizan las pretensiones de HERMECO para que se declare injustificada la objeción de la aseguradora y se ordene el pago del límite asegurado, frente a las excepciones de mérito de ALLIANZ, que sostienen que las pérdidas están excluidas por la falta de segregación de funciones y de doble control en las transferencias (exclusiones 26 y 31), así como por otros límites y deducibles del contrato. El tribunal interpreta de manera restrictiva el clausulado de la póliza, el alcance técnico del control dual y la segregación de funciones según los manuales y prácticas internas de HERMECO, valora la prueba sobre la forma real en que se ejecutaron las operaciones bancarias y define si se configuraron o no las exclusiones invocadas, así como la procedencia de los intereses moratorios, la suma asegurada reclamada y las demás consecuencias patrimoniales del siniestro.""",
-            "path": "2024 A 0012 09-04-2025.pdf",
-            "tags": [
-                "clausula_compromisoria",
-                "presupuestos_procesales",
-                "competencia_tribunal",
-                "exhibicion_documental",
-                "contrato_de_seguro",
-                "poliza_infidelidad_y_riesgos_financieros",
-                "exclusiones_de_cobertura",
-                "interpretacion_restrictiva_seguro",
-            ],
-        },
-        {
-            "industry": "Inmobiliario",
-            "radicado": "2024 A 0006",
-            "fecha_laudo": "2025-05-05",
-            "title": "INVERSIONES CONSUMAR S.A.S. vs. OPERADORA COLOMBIANA DE CINES S.A.S.",
-            "arbiter": "Tribunal: Juliana Torres, Felipe Arango, Ricardo Mejía",
-            "keywords": "arrendamiento local_comercial renovacion desahucio canon",
-            "content": """En el plano procesal, el laudo verifica la existencia, validez, eficacia y oponibilidad de la cláusula compromisoria del contrato de arrendamiento del local comercial 330 del Centro Comercial City Plaza, así como la competencia objetiva y subjetiva del tribunal para conocer las pretensiones de la demanda principal y de la demanda de reconvención, con la salvedad de la pretensión relativa a la comisión para la entrega del inmueble. Se detalla el trámite arbitral (admisión de la demanda, contestación con objeción al juramento estimatorio, demanda de reconvención, traslados, fijación de gastos, primera audiencia de trámite, decreto y práctica de pruebas documentales, testimoniales, interrogatorios y peritajes, así como sucesivas audiencias de pruebas y alegatos), se aprecia la tacha de sospecha frente a un testigo relacionado con el apoderado de la convocante conforme al artículo 211 del Código General del Proceso y a la jurisprudencia constitucional, y se concluye que, pese a dicho interés, su testimonio solo puede valorarse con mayor rigor dentro del conjunto probatorio, sin que se configure nulidad ni vicio procesal que impida proferir la decisión de fondo.
+class CaseEmbedding(db.Model):
+    """
+    Fila `row` de la matriz de embeddings (ver SemanticIndex): un fragmento
+    del resumen (page 0) o de una página del PDF del caso.
+    """
 
-En el plano sustancial, el tribunal centra el debate en la existencia, vigencia y alcances del contrato de arrendamiento de local comercial suscrito en 2013 y modificado por el Otrosí No. 1 de 2020, a partir del cual se discute si el vínculo terminó el 17 de septiembre de 2023, como sostiene la arrendadora, o si se renovó en los términos de los artículos 518 y 520 del Código de Comercio, como alega la arrendataria. Para ello, analiza el carácter tuitivo del régimen de arrendamiento de local comercial, la distinción entre prórroga y renovación, la naturaleza de la cláusula tercera del Otrosí No. 1 y su posible ineficacia por contrariar normas imperativas (artículo 524 del Código de Comercio), así como las comunicaciones cruzadas sobre la renovación, la alegada necesidad de desahucio, los señalamientos de mala fe y abuso del derecho, y la procedencia de las pretensiones principales y subsidiarias relativas a la restitución del inmueble, la cláusula penal, la regulación judicial del canon de arrendamiento posterior al 18 de septiembre de 2023, los intereses moratorios y la fijación del valor del canon con apoyo en los diversos dictámenes periciales de parte y de contradicción.""",
-            "path": "2024 A 0006 05-05-2025.pdf",
-            "tags": [
-                "clausula_compromisoria",
-                "competencia_tribunal",
-                "demanda_de_reconvencion",
-                "tacha_de_testigo",
-                "contrato_de_arrendamiento",
-                "derecho_de_renovacion",
-                "desahucio_comercial",
-                "canon_de_arrendamiento",
-            ],
-        },
-        {
-            "industry": "Inmobiliario",
-            "radicado": "2022 A 0048",
-            "fecha_laudo": "2025-01-24",
-            "title": "LUZ INDELY MEJÍA BERRÍO vs. HÉCTOR GIOVANNY CASTAÑO DÍAZ, JUAN CARLOS BEDOYA VALENCIA y PAULA ANDREA BEDOYA VALENCIA (litisconsorte necesaria)",
-            "arbiter": "Árbitro único: Sebastián Herrera",
-            "keywords": "promesa_permuta nulidad_relativa inmueble frutos",
-            "content": """En el plano procesal, el tribunal analiza la existencia, validez y alcance de las cláusulas compromisorias incluidas tanto en la promesa inicial como en la nota aclaratoria, para afirmar su competencia frente a todos los sujetos involucrados, incluyendo la integración de Paula Andrea Bedoya Valencia como litisconsorte necesaria en el polo pasivo por su doble condición de promitente compradora y apoderada general de uno de los demandados. Se estudian las excepciones de mérito relacionadas con la falta de conciliación como requisito de procedibilidad, la alegada falta de competencia, la indebida integración del contradictorio, la existencia de pleito acabado, compensación, prejudicialidad y otras defensas procesales, concluyendo que varias de ellas carecen de soporte fáctico y que la referencia a la conciliación se hizo con base en una ley ya derogada (Ley 640 de 2001) frente a la entrada en vigor de la Ley 2220 de 2022. Igualmente se abordan las medidas cautelares sobre el inmueble, las solicitudes de amparo de pobreza, las tachas de sospecha a testigos cercanos a las partes y las suspensiones convencionales del proceso, llevando al saneamiento integral del trámite y a la constatación de que no existen nulidades que impidan decidir de fondo.
+    __tablename__ = "case_embedding"
 
-En el plano sustancial, el tribunal concluye que el negocio denominado por las partes contrato de promesa de compraventa, que en realidad se estructura como una promesa de permuta de lote por unidades inmobiliarias futuras, complementada con una nota aclaratoria, carece de validez por no cumplir los requisitos legales de la promesa de contrato, por lo que se declara la nulidad del pacto y se descarta cualquier análisis de incumplimiento bilateral. A partir de esa nulidad, se ordena la restitución recíproca de las prestaciones: la demandante recupera la plena propiedad del inmueble identificado originalmente con la matrícula 001-693546, hoy 001-1288992 tras el englobe, con todas sus accesiones y edificaciones, mientras que debe restituir a los demandados las sumas recibidas por precio y financiación del proyecto, y estos son condenados a pagar a la actora los frutos percibidos del bien durante el periodo comprendido entre la presentación de la demanda y la fecha del laudo. El tribunal deja a salvo eventuales reclamaciones sobre el valor de las mejoras útiles y las relaciones con terceros acreedores hipotecarios, indicando que esas controversias tendrían que ventilarse en procesos judiciales distintos.""",
-            "path": "2022 A 0048 22-01-2025.pdf",
-            "tags": [
-                "clausula_compromisoria",
-                "competencia_tribunal",
-                "litisconsorcio_necesario",
-                "medidas_cautelares",
-                "promesa_de_compraventa",
-                "promesa_de_permuta",
-                "nulidad_absoluta",
-                "restitucion_de_prestaciones",
-                "mejoras_utiles",
-            ],
-        },
-    {
-        "industry": "Societario",
-        "radicado": "2022 A 0063",
-        "fecha_laudo": "2024-11-28",
-        "title": "ORION HOLDINGS S.A.S. vs. Lleras Holdings S.A.S., Bradley H. Hinkelman, Propiedad Raíz Casacol S.A.S. y Camila Caycedo Prieto",
-        "content": (
-            "En el plano procesal, el laudo arbitral resalta la existencia y alcance de la cláusula "
-            "compromisoria estatutaria de Lleras Holdings S.A.S. y la competencia del tribunal para "
-            "conocer no solo de las controversias derivadas del contrato social, sino también de las "
-            "diferencias relacionadas con el acuerdo de accionistas, en el marco de una coligación negocial. "
-            "Se estudian la regularidad de la convocatoria y celebración de la asamblea, la integración de "
-            "litisconsortes (incluida la participación de la usufructuaria de acciones), la reforma y "
-            "admisión de la demanda, las excepciones de mérito sobre indebida acumulación de pretensiones "
-            "y falta de competencia, así como la inexistencia de nulidades procesales que impidieran un "
-            "pronunciamiento de fondo. El tribunal analiza además el comportamiento procesal de las partes, "
-            "la admisión de la demanda reformada, la contestación con excepciones y la fijación del término "
-            "del proceso conforme a la Ley 1563 de 2012.\n\n"
-            "En el plano sustancial, la controversia gira en torno a la impugnación de las decisiones de la "
-            "asamblea de accionistas del 14 de octubre de 2022 (Acta No. 11), mediante las cuales se modificó "
-            "la composición de la junta directiva y se redujo el número de miembros de cinco (5) a cuatro (4), "
-            "con impacto directo en la posibilidad de que Orion designara la mayoría de los integrantes del órgano. "
-            "La convocante alega abuso del derecho al voto por parte de Bradley H. Hinkelman, Propiedad Raíz "
-            "Casacol S.A.S. y Camila Caycedo, así como una estrategia para notificar en el último momento el "
-            "pago del crédito de Rohan y otorgar un usufructo de acciones que permitiera configurar una mayoría "
-            "artificial en la asamblea. El tribunal examina el alcance del acuerdo de accionistas, la incidencia "
-            "del contrato de línea de crédito en el cómputo de votos, los requisitos del abuso del derecho al voto, "
-            "y las pretensiones de nulidad/ineficacia de las decisiones sociales y de revocatoria del registro del "
-            "Acta No. 11 ante la Cámara de Comercio, a la luz de la buena fe, la protección del equilibrio societario "
-            "y la doctrina sobre contratos coligados."
+    row = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    case_id = db.Column(db.Integer, db.ForeignKey("case.id"), nullable=False, index=True)
+    page = db.Column(db.Integer, nullable=False)
+    chunk = db.Column(db.Integer, nullable=False)
+    # sha256 del texto codificado: si cambia, el fragmento se vuelve a codificar
+    text_hash = db.Column(db.String(64), nullable=False)
+
+
+# --- Normalización de texto --------------------------------
+
+def normalize_text(value):
+    """
+    Forma canónica para buscar: minúsculas, sin tildes ("Árbitro" -> "arbitro"),
+    "_" como espacio y espacios colapsados. Se aplica igual a los datos y a q.
+    """
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value.replace("_", " "))
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.casefold().split())
+
+
+@event.listens_for(Case, "before_insert")
+@event.listens_for(Case, "before_update")
+@event.listens_for(Tag, "before_insert")
+@event.listens_for(Tag, "before_update")
+def _refresh_normalized_columns(mapper, connection, target):
+    target.refresh_normalized()
+
+
+def _has_duplicates(conn, index):
+    """True si la tabla ya tiene filas que violarían el índice único `index`."""
+    cols = list(index.columns)
+    query = select(*cols).group_by(*cols).having(func.count() > 1).limit(1)
+    return conn.execute(query).first() is not None
+
+
+# Columnas de "case" que además de radicado, título y contenido deben coincidir
+# para que una copia se borre sola (las *_norm y content_hash se derivan de estas)
+_DUPLICATE_CASE_COLUMNS = ("fecha_laudo", "doc_filename", "arbiter", "keywords", "industry")
+
+# Asociaciones de la copia que la fila conservada ya debe tener: (tabla, columnas)
+_DUPLICATE_CASE_LINKS = (
+    ("case_tags", ("tag_id",)),
+    ("case_arbiters", ("arbiter_id",)),
+    ("case_page", ("page", "text")),
+)
+
+
+def _duplicate_cases_sql(conn, tables):
+    """
+    Ids de las copias exactas de un caso con id mayor: mismo radicado, título,
+    contenido y demás columnas, y sin tags, árbitros ni páginas que el caso
+    conservado no tenga, así que borrarlas no pierde nada. Las dejó el dato de
+    ejemplo repetido en init_db y bloquean el índice único de radicado.
+    """
+    columns = {row[1] for row in conn.execute(text('PRAGMA table_info("case")'))}
+    conditions = [
+        "o.radicado = c.radicado",
+        "o.title = c.title",
+        "o.content = c.content",
+        "o.id < c.id",
+    ]
+    conditions += [f"o.{col} IS c.{col}" for col in _DUPLICATE_CASE_COLUMNS if col in columns]
+    for table, link_columns in _DUPLICATE_CASE_LINKS:
+        if table in tables:
+            same = " AND ".join(f"k.{col} = d.{col}" for col in link_columns)
+            conditions.append(
+                f"NOT EXISTS (SELECT 1 FROM {table} d WHERE d.case_id = c.id "
+                f"AND NOT EXISTS (SELECT 1 FROM {table} k WHERE k.case_id = o.id AND {same}))"
+            )
+    return f"""
+        SELECT c.id FROM "case" c
+        WHERE EXISTS (SELECT 1 FROM "case" o WHERE {" AND ".join(conditions)})
+    """
+
+
+def _drop_duplicate_cases(conn, tables):
+    """
+    Borrar las copias exactas de casos (ver _duplicate_cases_sql) y sus filas
+    asociadas en `tables`. Los radicados repetidos que difieren en algo se
+    dejan: el índice único no se crea y migrate_schema lo advierte.
+    """
+    ids = list(conn.scalars(text(_duplicate_cases_sql(conn, tables))))
+    if not ids:
+        return
+    statements = [
+        ("case_tags", "DELETE FROM case_tags WHERE case_id IN :ids"),
+        ("case_arbiters", "DELETE FROM case_arbiters WHERE case_id IN :ids"),
+        (FTS_TABLE, f"DELETE FROM {FTS_TABLE} WHERE rowid IN :ids"),
+        (
+            PAGE_FTS_TABLE,
+            f"DELETE FROM {PAGE_FTS_TABLE} WHERE rowid IN "
+            "(SELECT id FROM case_page WHERE case_id IN :ids)",
         ),
-        "path": "2022 A 0063 28-11-2024.pdf",
-        "tags": [
-            "clausula_compromisoria",
-            "pacto_arbitral_estatutario",
-            "competencia_tribunal",
-            "coligacion_negocial",
-            "contratos_coligados",
-            "impugnacion_de_decisiones_sociales",
-            "abuso_del_derecho_al_voto",
-            "acuerdo_de_accionistas",
-            "usufructo_de_acciones"
-            ]
+        ("case_page", "DELETE FROM case_page WHERE case_id IN :ids"),
+        # Sus vectores quedan huérfanos en la matriz (row_case -1) y
+        # SemanticIndex ya los ignora; embed_cases no los vuelve a usar
+        ("case_embedding", "DELETE FROM case_embedding WHERE case_id IN :ids"),
+        ("case_document", "DELETE FROM case_document WHERE case_id IN :ids"),
+        ("case", 'DELETE FROM "case" WHERE id IN :ids'),
+    ]
+    for table, sql in statements:
+        if table in tables:
+            conn.execute(
+                text(sql).bindparams(bindparam("ids", expanding=True)), {"ids": ids}
+            )
+    app.logger.warning("Se borraron %d casos duplicados: %s", len(ids), ids)
+
+
+def migrate_schema():
+    """
+    Agregar a una base existente las columnas e índices que db.create_all()
+    no crea en tablas ya existentes, y rellenar las columnas *_norm.
+    """
+    inspector = sa_inspect(db.engine)
+    with db.engine.begin() as conn:
+        tables = set(
+            conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        )
+        if "case" in tables:
+            _drop_duplicate_cases(conn, tables)
+
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=db.engine.dialect)
+                    conn.execute(
+                        text(f'ALTER TABLE "{table.name}" ADD COLUMN {column.name} {col_type}')
+                    )
+            # sqlite_master y no el inspector: este no refleja índices sobre expresiones
+            indexes = set(
+                conn.scalars(
+                    text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"),
+                    {"t": table.name},
+                )
+            )
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                if index.unique and _has_duplicates(conn, index):
+                    cols = ", ".join(col.name for col in index.columns)
+                    app.logger.warning(
+                        "No se creó el índice único %s: hay valores repetidos de (%s) en %s",
+                        index.name, cols, table.name,
+                    )
+                    continue
+                index.create(conn)
+
+    # Filas creadas antes de existir las columnas normalizadas
+    for model, column in ((Case, Case.title_norm), (Tag, Tag.name_norm)):
+        for obj in model.query.filter(column.is_(None)):
+            obj.refresh_normalized()
+    db.session.commit()
+
+
+# --- Índice de texto completo (FTS5) ------------------------
+
+# Tabla virtual que replica los campos buscables de cada caso (rowid = case.id).
+# No usamos triggers porque los tags viven en case_tags; en su lugar, las rutas
+# de escritura (init_db, create_case) llaman a sync_case_fts antes del commit.
+FTS_TABLE = "case_fts"
+FTS_COLUMNS = ("title", "content", "radicado", "arbiter", "keywords", "industry", "tags")
+
+_FTS_SOURCE_SELECT = """
+    SELECT c.id, c.title, c.content, c.radicado,
+           COALESCE(c.arbiter, ''), COALESCE(c.keywords, ''), COALESCE(c.industry, ''),
+           COALESCE((SELECT group_concat(t.name, ' ')
+                     FROM case_tags ct JOIN tag t ON t.id = ct.tag_id
+                     WHERE ct.case_id = c.id), '')
+    FROM "case" c
+"""
+
+# Texto completo de los PDF, una fila por página (rowid = case_page.id)
+PAGE_FTS_TABLE = "case_page_fts"
+PAGE_FTS_COLUMNS = ("text",)
+
+FTS_TABLES = {FTS_TABLE: FTS_COLUMNS, PAGE_FTS_TABLE: PAGE_FTS_COLUMNS}
+
+# None = aún no verificado; True/False = el motor soporta (o no) FTS5
+_fts_enabled = None
+
+
+def init_fts():
+    """
+    Crear las tablas virtuales FTS5 si el SQLite instalado las soporta.
+    Devuelve True si la de casos se acaba de crear (hay que poblarla completa).
+    """
+    global _fts_enabled
+    existing = {
+        row[0]
+        for row in db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN :names")
+            .bindparams(bindparam("names", expanding=True)),
+            {"names": list(FTS_TABLES)},
+        )
+    }
+    if len(existing) == len(FTS_TABLES):
+        _fts_enabled = True
+        return False
+    try:
+        for table, columns in FTS_TABLES.items():
+            if table in existing:
+                continue
+            db.session.execute(
+                text(
+                    f"CREATE VIRTUAL TABLE {table} "
+                    f"USING fts5({', '.join(columns)}, "
+                    "tokenize='unicode61 remove_diacritics 2')"
+                )
+            )
+        db.session.commit()
+        _fts_enabled = True
+    except OperationalError:
+        # SQLite compilado sin FTS5: search() cae al LIKE tradicional
+        db.session.rollback()
+        _fts_enabled = False
+        return False
+
+    if PAGE_FTS_TABLE not in existing:
+        # Base con páginas ya extraídas de antes de existir el índice
+        sync_page_fts()
+        db.session.commit()
+    return FTS_TABLE not in existing
+
+
+def fts_available():
+    """True si las tablas FTS5 existen en la base de datos actual."""
+    global _fts_enabled
+    if _fts_enabled is None:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        _fts_enabled = row is not None
+    return _fts_enabled
+
+
+def sync_case_fts(case_ids=None):
+    """
+    Reindexar en FTS5 los casos indicados (todos si case_ids es None).
+
+    No hace commit: se ejecuta dentro de la transacción de quien escribe,
+    después de un flush para que case_tags ya tenga las filas nuevas.
+    """
+    if not fts_available():
+        return
+
+    columns = ", ".join(("rowid",) + FTS_COLUMNS)
+    if case_ids is None:
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        db.session.execute(text(f"INSERT INTO {FTS_TABLE}({columns}) {_FTS_SOURCE_SELECT}"))
+        return
+
+    ids = list(case_ids)
+    if not ids:
+        return
+    params = {"ids": ids}
+    db.session.execute(
+        text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        ),
+        params,
+    )
+    db.session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE}({columns}) {_FTS_SOURCE_SELECT} WHERE c.id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        params,
+    )
+
+
+def sync_page_fts(case_ids=None):
+    """
+    Reindexar en FTS5 las páginas de los casos indicados (todas si case_ids
+    es None), a partir de case_page. Sin commit, como sync_case_fts.
+    """
+    if not fts_available():
+        return
+
+    if case_ids is None:
+        db.session.execute(text(f"DELETE FROM {PAGE_FTS_TABLE}"))
+        db.session.execute(
+            text(f"INSERT INTO {PAGE_FTS_TABLE}(rowid, text) SELECT id, text FROM case_page")
+        )
+        return
+
+    ids = list(case_ids)
+    if not ids:
+        return
+    params = {"ids": ids}
+    # Por rowid (case_page.id): las filas de case_page se reemplazan después
+    db.session.execute(
+        text(
+            f"DELETE FROM {PAGE_FTS_TABLE} WHERE rowid IN "
+            "(SELECT id FROM case_page WHERE case_id IN :ids)"
+        ).bindparams(bindparam("ids", expanding=True)),
+        params,
+    )
+
+
+# Palabras más cortas se buscan exactas: como prefijo, "a" o "de" expanden a
+# buena parte del vocabulario (radicados "2024 A 0052", "S.A.S.", "de la")
+FTS_PREFIX_MIN_CHARS = 3
+
+
+def _fts_match_expression(q):
+    """
+    Convertir el texto libre del usuario en una expresión MATCH segura.
+
+    Cada palabra se cita (para que operadores como AND/NEAR o comillas sueltas
+    no rompan la consulta) y, desde FTS_PREFIX_MIN_CHARS letras, se usa como
+    prefijo: "contrat" encuentra "contrato" y "contratista".
+    """
+    terms = re.findall(r"[^\W_]+", q.lower())
+    return " ".join(
+        f'"{t}"*' if len(t) >= FTS_PREFIX_MIN_CHARS else f'"{t}"' for t in terms
+    )
+
+
+def fts_search(q, limit=None):
+    """Ids de casos que coinciden con q, ordenados por BM25 (mejor primero)."""
+    match = _fts_match_expression(q)
+    if not match:
+        return []
+
+    weights = ", ".join(str(float(w)) for w in app.config["FTS_BM25_WEIGHTS"])
+    sql = (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+        f"ORDER BY bm25({FTS_TABLE}, {weights})"
+    )
+    params = {"match": match}
+    if limit:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return [row[0] for row in db.session.execute(text(sql), params)]
+
+
+def fts_search_pages(q, limit=None):
+    """
+    Ids de casos cuyo PDF tiene alguna página que coincide con q, ordenados
+    por el BM25 de su mejor página.
+    """
+    match = _fts_match_expression(q)
+    if not match:
+        return []
+
+    # rank es bm25() con pesos por defecto; a diferencia de bm25() se puede
+    # leer desde una subconsulta
+    sql = (
+        f"SELECT p.case_id FROM "
+        f"(SELECT rowid, rank AS score FROM {PAGE_FTS_TABLE} "
+        f" WHERE {PAGE_FTS_TABLE} MATCH :match) f "
+        "JOIN case_page p ON p.id = f.rowid "
+        "GROUP BY p.case_id ORDER BY MIN(f.score)"
+    )
+    params = {"match": match}
+    if limit:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return [row[0] for row in db.session.execute(text(sql), params)]
+
+
+# Marcas que snippet() pone alrededor de cada término; son caracteres de
+# control para poder escapar el texto antes de convertirlas en <mark>
+_HL_OPEN, _HL_CLOSE, _HL_ELLIPSIS = "\x02", "\x03", "\u2026"
+SNIPPET_TOKENS = 40
+
+
+def _highlight_markup(raw):
+    """Texto de snippet() -> HTML seguro con los términos en <mark>."""
+    return Markup(
+        str(escape(raw)).replace(_HL_OPEN, "<mark>").replace(_HL_CLOSE, "</mark>")
+    )
+
+
+def fts_snippets(q, case_ids):
+    """
+    {case_id: Markup} con el fragmento del resumen (content) donde más
+    coincide q, resaltado por FTS5 snippet(); solo para case_ids.
+    """
+    match = _fts_match_expression(q)
+    if not match or not case_ids:
+        return {}
+
+    # "+rowid": con rowid IN a secas FTS5 repite la consulta (y la expansión
+    # de cada prefijo) una vez por id; así se evalúa una sola vez y snippet()
+    # solo corre para los casos de la página
+    content_col = FTS_COLUMNS.index("content")
+    rows = db.session.execute(
+        text(
+            f"SELECT rowid, snippet({FTS_TABLE}, {content_col}, :open, :close, "
+            f":ellipsis, {SNIPPET_TOKENS}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH :match AND +rowid IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {
+            "match": match,
+            "ids": list(case_ids),
+            "open": _HL_OPEN,
+            "close": _HL_CLOSE,
+            "ellipsis": _HL_ELLIPSIS,
+        },
+    )
+    # Si q solo coincide en otra columna (título, tags...) no hay marcas
+    return {
+        case_id: _highlight_markup(raw)
+        for case_id, raw in rows
+        if raw and _HL_OPEN in raw
+    }
+
+
+def fts_page_snippets(q, case_ids):
+    """
+    {case_id: (página, Markup)} con la página del PDF que mejor coincide con
+    q en cada caso de case_ids y su fragmento resaltado.
+    """
+    match = _fts_match_expression(q)
+    if not match or not case_ids:
+        return {}
+
+    # Primero la mejor página de cada caso, sin snippet(): calcularlo para
+    # cada página que coincide costaba tanto como ordenar por rank
+    ids = set(case_ids)
+    best = {}
+    for case_id, page_id, page in db.session.execute(
+        text(
+            f"SELECT p.case_id, p.id, p.page FROM {PAGE_FTS_TABLE} "
+            f"JOIN case_page p ON p.id = {PAGE_FTS_TABLE}.rowid "
+            f"WHERE {PAGE_FTS_TABLE} MATCH :match AND p.case_id IN :ids "
+            "ORDER BY rank"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {"match": match, "ids": list(ids)},
+    ):
+        # Ordenado por rank: la primera fila de cada caso es su mejor página
+        best.setdefault(case_id, (page_id, page))
+        if len(best) == len(ids):
+            break
+    if not best:
+        return {}
+    pages = {page_id: (case_id, page) for case_id, (page_id, page) in best.items()}
+
+    # Y el fragmento solo de esas páginas ("+rowid", como en fts_snippets)
+    rows = db.session.execute(
+        text(
+            f"SELECT rowid, snippet({PAGE_FTS_TABLE}, 0, :open, :close, "
+            f":ellipsis, {SNIPPET_TOKENS}) FROM {PAGE_FTS_TABLE} "
+            f"WHERE {PAGE_FTS_TABLE} MATCH :match AND +rowid IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {
+            "match": match,
+            "ids": list(pages),
+            "open": _HL_OPEN,
+            "close": _HL_CLOSE,
+            "ellipsis": _HL_ELLIPSIS,
+        },
+    )
+    return {
+        pages[page_id][0]: (pages[page_id][1], _highlight_markup(raw))
+        for page_id, raw in rows
+    }
+
+
+# --- Texto completo de los laudos (PDF) ---------------------
+
+def extract_pdf_pages(path):
+    """
+    Texto de cada página de un PDF, con espacios colapsados. Se ejecuta en
+    los procesos del pool de extract_case_documents (parsear es CPU puro).
+    """
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+    reader = PdfReader(path)
+    return [" ".join((page.extract_text() or "").split()) for page in reader.pages]
+
+
+def store_case_pages(case_id, pages):
+    """Reemplazar las páginas de un caso en case_page y en su índice FTS5."""
+    sync_page_fts([case_id])  # borra las entradas FTS de las páginas viejas
+    CasePage.query.filter_by(case_id=case_id).delete()
+    rows = [
+        {"case_id": case_id, "page": number, "text": page_text}
+        for number, page_text in enumerate(pages, start=1)
+        if page_text
+    ]
+    if rows:
+        db.session.execute(insert(CasePage), rows)
+    if fts_available():
+        db.session.execute(
+            text(
+                f"INSERT INTO {PAGE_FTS_TABLE}(rowid, text) "
+                "SELECT id, text FROM case_page WHERE case_id = :case_id"
+            ),
+            {"case_id": case_id},
+        )
+
+
+def extract_case_documents(workers=None, force=False, log=None):
+    """
+    Extraer a case_page el texto de los PDF de todos los casos con
+    doc_filename, en un pool de `workers` procesos (None = uno por núcleo).
+
+    Es incremental: un archivo con el mismo nombre, mtime y tamaño que en la
+    última extracción se salta (force=True lo reprocesa). Si el archivo ya no
+    está, se borran sus páginas. Cada documento se guarda en su propia
+    transacción, así que interrumpir el proceso no pierde lo ya extraído.
+    Devuelve un Counter con extracted/skipped/missing/failed.
+    """
+    if PdfReader is None:
+        raise RuntimeError("Falta la dependencia opcional pypdf (pip install pypdf)")
+    log = log or (lambda message: None)
+
+    docs_dir = app.config["CASE_DOCS_DIR"]
+    known = {doc.case_id: doc for doc in CaseDocument.query}
+    stats = Counter()
+
+    pending = []
+    for case_id, filename in db.session.execute(
+        select(Case.id, Case.doc_filename).where(Case.doc_filename.isnot(None))
+    ):
+        path = os.path.join(docs_dir, filename)
+        try:
+            st = os.stat(path)
+        except OSError:
+            stats["missing"] += 1
+            if case_id in known:
+                store_case_pages(case_id, [])
+                db.session.delete(known[case_id])
+                db.session.commit()
+            continue
+
+        doc = known.get(case_id)
+        if (
+            not force
+            and doc is not None
+            and (doc.filename, doc.mtime, doc.size) == (filename, st.st_mtime, st.st_size)
+        ):
+            stats["skipped"] += 1
+            continue
+        pending.append((case_id, filename, path, st))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(extract_pdf_pages, path): (case_id, filename, st)
+                for case_id, filename, path, st in pending
+            }
+            for future in as_completed(futures):
+                case_id, filename, st = futures[future]
+                try:
+                    pages = future.result()
+                except Exception as exc:  # PDF dañado o cifrado: seguimos con el resto
+                    stats["failed"] += 1
+                    log(f"ERROR {filename}: {exc}")
+                    continue
+
+                store_case_pages(case_id, pages)
+                db.session.merge(
+                    CaseDocument(
+                        case_id=case_id,
+                        filename=filename,
+                        mtime=st.st_mtime,
+                        size=st.st_size,
+                        page_count=len(pages),
+                    )
+                )
+                db.session.commit()
+                stats["extracted"] += 1
+                log(f"{filename}: {len(pages)} páginas")
+
+    if stats["extracted"] or stats["missing"]:
+        bump_data_generation()
+    return stats
+
+
+@app.cli.command("extract-docs")
+@click.option("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo).")
+@click.option("--force", is_flag=True, help="Reprocesar también los PDF que no cambiaron.")
+def extract_docs_command(workers, force):
+    """Indexar el texto completo de los laudos PDF de CASE_DOCS_DIR."""
+    init_db()
+    try:
+        stats = extract_case_documents(workers=workers, force=force, log=click.echo)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(
+        f"{stats['extracted']} extraídos, {stats['skipped']} sin cambios, "
+        f"{stats['missing']} sin archivo, {stats['failed']} con error"
+    )
+
+
+# --- Índice fuzzy en memoria (trigramas) --------------------
+
+class FuzzyIndex:
+    """
+    Índice invertido de trigramas para preseleccionar candidatos fuzzy.
+
+    Vive en memoria del proceso: se construye una vez (desde init_db o
+    perezosamente en la primera búsqueda) y create_case le agrega cada caso
+    nuevo; si otro proceso escribió en la base (external_generation) se
+    vuelve a construir. Así search() ya no carga todas las filas por request y WRatio solo
+    puntúa unos cientos de candidatos en vez del corpus completo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._texts = {}  # case_id -> texto representativo ya preprocesado
+        self._postings = defaultdict(set)  # trigrama -> {case_id}
+        self._built = False
+        self._generation = None  # external_generation() con la que se cargó
+
+    @staticmethod
+    def case_text(title, keywords, industry):
+        """
+        Texto que se compara con q (título + keywords + industria), armado con
+        las columnas *_norm y pasado por fuzzy_process una sola vez al indexar.
+        """
+        return fuzzy_process(f"{title} {keywords or ''} {industry or ''}")
+
+    @staticmethod
+    def trigrams(value):
+        """Trigramas por palabra, con relleno al estilo pg_trgm ("  pa", "pac", ...)."""
+        grams = set()
+        for word in re.findall(r"[^\W_]+", value.lower()):
+            padded = f"  {word} "
+            for i in range(len(padded) - 2):
+                grams.add(padded[i:i + 3])
+        return grams
+
+    def _index(self, case_id, value):
+        self._texts[case_id] = value
+        for gram in self.trigrams(value):
+            self._postings[gram].add(case_id)
+
+    def rebuild(self):
+        """Recargar el índice completo desde la base de datos."""
+        with self._lock:
+            self._load()
+
+    def _ensure_built(self):
+        # Los casos que escribe otro proceso no pasan por add(): se recarga
+        if not self._built or self._generation != external_generation():
+            with self._lock:
+                if not self._built or self._generation != external_generation():
+                    self._load()
+
+    def _load(self):
+        # Con el lock tomado: un add() de un caso confirmado durante la carga
+        # espera y se aplica encima, en vez de perderse porque _built era False
+        self._generation = external_generation()
+        rows = Case.query.with_entities(
+            Case.id, Case.title_norm, Case.keywords_norm, Case.industry_norm
+        ).all()
+        self._texts = {}
+        self._postings = defaultdict(set)
+        for row in rows:
+            self._index(
+                row.id,
+                self.case_text(row.title_norm, row.keywords_norm, row.industry_norm),
+            )
+        self._built = True
+
+    def add(self, case_id, title, keywords, industry):
+        """
+        Indexar (o reindexar) un caso sin recorrer el resto del corpus.
+        Recibe los valores ya normalizados (title_norm, keywords_norm, ...).
+        """
+        with self._lock:
+            if not self._built:
+                # Se indexará completo en la primera búsqueda
+                return
+            old = self._texts.get(case_id)
+            if old is not None:
+                for gram in self.trigrams(old):
+                    self._postings[gram].discard(case_id)
+            self._index(case_id, self.case_text(title, keywords, industry))
+
+    def candidates(self, q, limit):
+        """
+        Devolver (ids, textos) de los `limit` casos que más trigramas comparten
+        con q: dos listas paralelas listas para un FuzzyScorer.
+        """
+        self._ensure_built()
+
+        with self._lock:
+            postings = [
+                self._postings[g]
+                for g in self.trigrams(fuzzy_process(normalize_text(q)))
+                if g in self._postings
+            ]
+            if not postings:
+                return [], []
+
+            # Los trigramas presentes en buena parte del corpus no discriminan
+            # y son los que más cuestan; si todos son comunes usamos el más raro.
+            max_df = max(limit, int(len(self._texts) * app.config["FUZZY_MAX_TRIGRAM_DF"]))
+            postings.sort(key=len)
+            selective = [ids for ids in postings if len(ids) <= max_df] or postings[:1]
+
+            counts = Counter()
+            for ids in selective:
+                counts.update(ids)
+            top = heapq.nlargest(limit, counts.items(), key=lambda item: item[1])
+            ids = [case_id for case_id, _ in top]
+            return ids, [self._texts[case_id] for case_id in ids]
+
+
+fuzzy_index = FuzzyIndex()
+
+
+# --- Autocompletado (prefijos en memoria) -------------------
+
+SuggestEntry = namedtuple("SuggestEntry", ["key", "kind", "label", "ref"])
+
+# Orden de los tipos en la respuesta de /api/suggest
+SUGGEST_KINDS = ("radicado", "tag", "arbiter", "industry", "title")
+
+
+class SuggestIndex:
+    """
+    Arreglo de SuggestEntry ordenado por clave normalizada: un prefijo se
+    resuelve con bisect más un recorrido corto, sin tocar SQLite. Como
+    FuzzyIndex, se arma perezosamente en la primera consulta y las rutas de
+    escritura le agregan los casos, tags y árbitros nuevos; se recarga
+    cuando otro proceso escribió en la base.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Dos listas ordenadas: la principal y las entradas agregadas desde la
+        # última fusión, para no reordenar todo el índice en cada escritura
+        self._entries = []  # SuggestEntry
+        self._recent = []
+        self._by_case = {}  # case_id -> entradas del caso (para reemplazarlas)
+        self._names = set()  # (kind, ref) de tags, árbitros e industrias ya indexados
+        self._built = False
+        self._generation = None  # external_generation() con la que se cargó
+
+    @staticmethod
+    def case_entries(case_id, radicado, title):
+        """
+        Entradas de un caso: el radicado completo y su número final
+        ("2024 A 0052" y "0052"), el título y cada parte después de "vs.".
+        """
+        radicado_key = normalize_text(radicado)
+        title_key = normalize_text(title)
+        keys = [(radicado_key, "radicado", radicado), (title_key, "title", title)]
+        number = radicado_key.rsplit(" ", 1)[-1]
+        if number != radicado_key:
+            keys.append((number, "radicado", radicado))
+        keys += [(part.strip(), "title", title) for part in title_key.split(" vs. ")[1:]]
+        return [SuggestEntry(key, kind, label, case_id) for key, kind, label in keys if key]
+
+    def _name_entries(self, kind, pairs):
+        entries = []
+        for ref, name in pairs:
+            if name and (kind, ref) not in self._names:
+                self._names.add((kind, ref))
+                entries.append(SuggestEntry(normalize_text(name), kind, name, ref))
+        return entries
+
+    def _insert(self, entries):
+        if len(entries) <= 32:
+            for entry in entries:
+                insort(self._recent, entry)
+        else:
+            self._recent.extend(entries)
+            self._recent.sort()
+        # Se fusiona cuando _recent crece en proporción a la principal: cada
+        # entrada se mueve O(log n) veces en total, no una vez por escritura
+        if len(self._recent) > max(4096, len(self._entries) // 8):
+            self._entries.extend(self._recent)
+            self._entries.sort()
+            self._recent = []
+
+    def _remove(self, entry):
+        index = bisect_left(self._recent, entry)
+        if index < len(self._recent) and self._recent[index] == entry:
+            del self._recent[index]
+        else:
+            del self._entries[bisect_left(self._entries, entry)]
+
+    def rebuild(self):
+        """Recargar el índice completo desde la base de datos."""
+        with self._lock:
+            self._load()
+
+    def _ensure_built(self):
+        # Como FuzzyIndex: lo que escribe otro proceso obliga a recargar
+        if not self._built or self._generation != external_generation():
+            with self._lock:
+                if not self._built or self._generation != external_generation():
+                    self._load()
+
+    def _load(self):
+        # Con el lock tomado, como en FuzzyIndex: las escrituras que llegan
+        # durante la carga esperan y se agregan después
+        self._generation = external_generation()
+        cases = db.session.execute(select(Case.id, Case.radicado, Case.title, Case.industry)).all()
+        tags = db.session.execute(select(Tag.id, Tag.name)).all()
+        arbiters = db.session.execute(select(Arbiter.id, Arbiter.name)).all()
+        self._entries, self._recent, self._by_case, self._names = [], [], {}, set()
+        for case_id, radicado, title, _ in cases:
+            self._by_case[case_id] = self.case_entries(case_id, radicado, title)
+            self._entries.extend(self._by_case[case_id])
+        self._entries.extend(self._name_entries("tag", tags))
+        self._entries.extend(self._name_entries("arbiter", arbiters))
+        self._entries.extend(
+            self._name_entries("industry", ((row[3], row[3]) for row in cases))
+        )
+        self._entries.sort()
+        self._built = True
+
+    def add_cases(self, rows):
+        """Indexar (o reindexar) casos [(case_id, radicado, title, industry)]."""
+        with self._lock:
+            if not self._built:
+                # Se indexará completo en la primera consulta
+                return
+            entries = []
+            for case_id, radicado, title, industry in rows:
+                for old in self._by_case.pop(case_id, ()):
+                    self._remove(old)
+                self._by_case[case_id] = self.case_entries(case_id, radicado, title)
+                entries += self._by_case[case_id]
+                entries += self._name_entries("industry", [(industry, industry)])
+            self._insert(entries)
+
+    def add_names(self, kind, pairs):
+        """Indexar tags o árbitros nuevos: kind "tag"/"arbiter", pairs [(id, nombre)]."""
+        with self._lock:
+            if self._built:
+                self._insert(self._name_entries(kind, pairs))
+
+    def suggest(self, prefix, limit):
+        """Hasta `limit` SuggestEntry cuya clave empieza por prefix, por tipo y clave."""
+        key = normalize_text(prefix)
+        if not key:
+            return []
+        self._ensure_built()
+
+        found = {}
+        scan = app.config["SUGGEST_SCAN"]
+        with self._lock:
+            for entries in (self._entries, self._recent):
+                start = bisect_left(entries, (key,))
+                for entry in entries[start:start + scan]:
+                    if not entry.key.startswith(key):
+                        break
+                    # Un caso aparece una vez aunque coincida por título y por parte
+                    found.setdefault((entry.kind, entry.ref), entry)
+        order = {kind: i for i, kind in enumerate(SUGGEST_KINDS)}
+        return sorted(found.values(), key=lambda e: (order[e.kind], e.key, e.label))[:limit]
+
+
+suggest_index = SuggestIndex()
+
+
+# --- Puntuación fuzzy (motores intercambiables) -------------
+
+def fuzzy_process(value):
+    """Mismo preprocesamiento que aplica thefuzz a WRatio (ASCII, minúsculas, alfanumérico)."""
+    return full_process(value, force_ascii=True)
+
+
+class FuzzyScorer:
+    """
+    Interfaz de los motores de puntuación fuzzy.
+
+    score() recibe q y dos listas paralelas (ids, textos preprocesados) y
+    devuelve [(case_id, score)] con score >= min_score, mejor primero y a lo
+    sumo `limit` elementos.
+    """
+
+    def score(self, q, ids, texts, limit, min_score):
+        raise NotImplementedError
+
+
+class ThefuzzScorer(FuzzyScorer):
+    """Motor original: thefuzz.process.extract, un candidato a la vez."""
+
+    def score(self, q, ids, texts, limit, min_score):
+        results = process.extract(
+            normalize_text(q), dict(zip(ids, texts)), limit=limit, scorer=fuzz.WRatio
+        )
+        return [(key, score) for _, score, key in results if score >= min_score]
+
+
+class RapidfuzzScorer(FuzzyScorer):
+    """
+    Motor en lote: puntúa q contra todos los candidatos en una sola llamada
+    a rapidfuzz (C++). Con numpy instalado usa process.cdist repartido en
+    `workers` hilos; sin numpy, process.extract.
+    """
+
+    def __init__(self, workers=-1):
+        self.workers = workers
+
+    def score(self, q, ids, texts, limit, min_score):
+        query = fuzzy_process(normalize_text(q))
+        if not query or not texts:
+            return []
+
+        if np is None:
+            results = rf_process.extract(
+                query,
+                texts,
+                scorer=rf_fuzz.WRatio,
+                processor=None,
+                limit=limit,
+                score_cutoff=min_score,
+            )
+            return [(ids[i], round(score)) for _, score, i in results]
+
+        scores = rf_process.cdist(
+            [query],
+            texts,
+            scorer=rf_fuzz.WRatio,
+            processor=None,
+            score_cutoff=min_score,
+            workers=self.workers,
+        )[0]
+        # cdist deja en 0 los puntajes bajo score_cutoff
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return [(ids[i], round(float(scores[i]))) for i in top if scores[i] >= min_score]
+
+
+FUZZY_SCORERS = {
+    "thefuzz": ThefuzzScorer,
+    "rapidfuzz": RapidfuzzScorer,
+}
+
+
+def get_fuzzy_scorer():
+    """Instanciar el motor configurado en app.config["FUZZY_SCORER"]."""
+    name = app.config["FUZZY_SCORER"]
+    if name not in FUZZY_SCORERS:
+        raise ValueError(f"FUZZY_SCORER desconocido: {name!r}")
+    if name == "rapidfuzz":
+        return RapidfuzzScorer(workers=app.config["FUZZY_WORKERS"])
+    return FUZZY_SCORERS[name]()
+
+
+# --- Búsqueda semántica (embeddings + índice ANN) ----------
+
+# Archivos en SEMANTIC_INDEX_DIR: la matriz float32 (una fila por fragmento,
+# vectores normalizados, solo se agregan filas), el índice HNSW sobre esas
+# filas y meta.json con el modelo, la dimensión y cuántas filas son válidas
+SEMANTIC_VECTORS_FILE = "vectors.f32"
+SEMANTIC_ANN_FILE = "hnsw.bin"
+SEMANTIC_META_FILE = "meta.json"
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def semantic_dependencies_error():
+    """Mensaje con las dependencias opcionales que faltan, o None."""
+    missing = [
+        name
+        for name, module in (("numpy", np), ("sentence-transformers", SentenceTransformer))
+        if module is None
+    ]
+    if missing:
+        return f"Faltan dependencias opcionales: {', '.join(missing)} (pip install {' '.join(missing)})"
+    return None
+
+
+def get_embedder():
+    """Modelo SEMANTIC_MODEL cargado una sola vez por proceso, en CPU."""
+    global _embedder
+    error = semantic_dependencies_error()
+    if error:
+        raise RuntimeError(error)
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = SentenceTransformer(app.config["SEMANTIC_MODEL"], device="cpu")
+        return _embedder
+
+
+def embed_texts(texts, batch_size=None):
+    """Matriz float32 (len(texts) x dim) de embeddings normalizados (norma 1)."""
+    vectors = get_embedder().encode(
+        list(texts),
+        batch_size=batch_size or app.config["SEMANTIC_BATCH_SIZE"],
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def semantic_chunks(value, size):
+    """
+    Partir un texto en fragmentos de hasta `size` caracteres, cortando en
+    espacios. El modelo trunca entradas largas, así que cada fragmento de una
+    página se codifica por separado.
+    """
+    words = (value or "").split()
+    chunks, current, length = [], [], 0
+    for word in words:
+        if current and length + 1 + len(word) > size:
+            chunks.append(" ".join(current))
+            current, length = [], 0
+        current.append(word)
+        length += len(word) + (1 if length else 0)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _semantic_units():
+    """(case_id, page, chunk, texto) de todo lo que se codifica: resúmenes y páginas."""
+    size = app.config["SEMANTIC_CHUNK_CHARS"]
+    for case_id, content in db.session.execute(select(Case.id, Case.content)):
+        for i, chunk in enumerate(semantic_chunks(content, size)):
+            yield case_id, 0, i, chunk
+    for case_id, page, page_text in db.session.execute(
+        select(CasePage.case_id, CasePage.page, CasePage.text)
+    ):
+        for i, chunk in enumerate(semantic_chunks(page_text, size)):
+            yield case_id, page, i, chunk
+
+
+def _read_semantic_meta(index_dir):
+    try:
+        with open(os.path.join(index_dir, SEMANTIC_META_FILE), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_semantic_meta(index_dir, meta):
+    # Reemplazo atómico: el servidor puede estar leyéndolo
+    path = os.path.join(index_dir, SEMANTIC_META_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    os.replace(path + ".tmp", path)
+
+
+def embed_cases(rebuild=False, batch_size=None, log=None):
+    """
+    Codificar los fragmentos nuevos o modificados y agregarlos a la matriz y
+    al índice ANN. Es incremental: un fragmento cuyo texto no cambió
+    (mismo text_hash) no se vuelve a codificar; los que ya no existen o
+    cambiaron se marcan como borrados. rebuild=True (o cambiar de modelo)
+    empieza de cero. meta.json se escribe al final, junto con el índice: si
+    la corrida se interrumpe, la siguiente descarta lo que quedó a medias.
+    Devuelve un Counter con encoded/unchanged/removed.
+    """
+    error = semantic_dependencies_error()
+    if error:
+        # Antes de tocar el disco: sin dependencias no se crea SEMANTIC_INDEX_DIR
+        raise RuntimeError(error)
+    log = log or (lambda message: None)
+    batch_size = batch_size or app.config["SEMANTIC_BATCH_SIZE"]
+    index_dir = app.config["SEMANTIC_INDEX_DIR"]
+    os.makedirs(index_dir, exist_ok=True)
+    vectors_path = os.path.join(index_dir, SEMANTIC_VECTORS_FILE)
+    ann_path = os.path.join(index_dir, SEMANTIC_ANN_FILE)
+    dim = get_embedder().get_sentence_embedding_dimension()
+    stats = Counter()
+
+    meta = _read_semantic_meta(index_dir)
+    if rebuild or meta is None or (meta["model"], meta["dim"]) != (app.config["SEMANTIC_MODEL"], dim):
+        CaseEmbedding.query.delete()
+        db.session.commit()
+        for path in (vectors_path, ann_path):
+            if os.path.exists(path):
+                os.remove(path)
+        meta = {"model": app.config["SEMANTIC_MODEL"], "dim": dim, "rows": 0}
+
+    # Filas escritas por una corrida interrumpida antes de actualizar meta.json
+    CaseEmbedding.query.filter(CaseEmbedding.row >= meta["rows"]).delete()
+    db.session.commit()
+    with open(vectors_path, "ab") as fh:
+        fh.truncate(meta["rows"] * dim * 4)
+
+    stored = {
+        (e.case_id, e.page, e.chunk): (e.row, e.text_hash)
+        for e in CaseEmbedding.query.with_entities(
+            CaseEmbedding.row, CaseEmbedding.case_id, CaseEmbedding.page,
+            CaseEmbedding.chunk, CaseEmbedding.text_hash,
+        )
+    }
+    pending = []  # (case_id, page, chunk, text_hash, texto)
+    current = set()
+    for case_id, page, chunk, chunk_text in _semantic_units():
+        key = (case_id, page, chunk)
+        current.add(key)
+        text_hash = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+        if key in stored and stored[key][1] == text_hash:
+            stats["unchanged"] += 1
+        else:
+            pending.append(key + (text_hash, chunk_text))
+
+    changed = {key for key in stored if key not in current} | {p[:3] for p in pending if p[:3] in stored}
+    stale_rows = [stored[key][0] for key in changed]
+    if stale_rows:
+        CaseEmbedding.query.filter(CaseEmbedding.row.in_(stale_rows)).delete()
+        db.session.commit()
+        stats["removed"] = len(stale_rows)
+
+    ann = None
+    if hnswlib is not None:
+        ann = hnswlib.Index(space="ip", dim=dim)
+        capacity = max(meta["rows"] + len(pending), 1)
+        if os.path.exists(ann_path) and meta["rows"]:
+            ann.load_index(ann_path, max_elements=capacity)
+        else:
+            ann.init_index(max_elements=capacity, ef_construction=200, M=16)
+            if meta["rows"]:
+                # Índice perdido o de una versión sin hnswlib: se arma desde la matriz
+                matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(meta["rows"], dim))
+                ann.add_items(matrix, np.arange(meta["rows"]))
+                live = {e.row for e in CaseEmbedding.query.with_entities(CaseEmbedding.row)}
+                stale_rows = list(set(range(meta["rows"])) - live)
+        for row in stale_rows:
+            try:
+                ann.mark_deleted(row)
+            except RuntimeError:  # ya estaba borrada
+                pass
+
+    rows_before = meta["rows"]
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        vectors = embed_texts([p[4] for p in batch], batch_size=batch_size)
+        rows = np.arange(meta["rows"], meta["rows"] + len(batch))
+        with open(vectors_path, "ab") as fh:
+            fh.write(vectors.tobytes())
+        if ann is not None:
+            ann.add_items(vectors, rows)
+        db.session.execute(
+            insert(CaseEmbedding),
+            [
+                {"row": int(row), "case_id": case_id, "page": page, "chunk": chunk, "text_hash": text_hash}
+                for row, (case_id, page, chunk, text_hash, _) in zip(rows, batch)
+            ],
+        )
+        db.session.commit()
+        meta["rows"] += len(batch)
+        stats["encoded"] += len(batch)
+        log(f"{stats['encoded']}/{len(pending)} fragmentos codificados")
+
+    if ann is not None and (pending or stale_rows or not os.path.exists(ann_path)):
+        ann.save_index(ann_path)
+    # Al cambiar meta.json, el servidor recarga matriz e índice (ver SemanticIndex)
+    if meta["rows"] != rows_before or stale_rows or not os.path.exists(
+        os.path.join(index_dir, SEMANTIC_META_FILE)
+    ):
+        _write_semantic_meta(index_dir, meta)
+        bump_data_generation()
+    return stats
+
+
+# matrix: filas x dim (mmap); row_case: fila -> case_id (-1 = fragmento
+# borrado); ann: índice HNSW o None; live: fragmentos vigentes
+SemanticState = namedtuple("SemanticState", ["matrix", "row_case", "ann", "live"])
+
+
+class SemanticIndex:
+    """
+    Vecinos más cercanos de q entre los fragmentos codificados por
+    embed_cases. La matriz se abre con mmap (el sistema operativo pagina
+    solo lo que se lee) y se recarga cuando cambia meta.json, así que el
+    servidor ve lo que codifica `flask embed-cases` en otro proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None  # (mtime_ns, size) de meta.json ya cargado
+        self._state = None
+
+    def _load(self):
+        """Estado vigente (recargado si cambió meta.json), o None si no hay índice."""
+        index_dir = app.config["SEMANTIC_INDEX_DIR"]
+        try:
+            st = os.stat(os.path.join(index_dir, SEMANTIC_META_FILE))
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                self._state = self._read(index_dir)
+                self._stamp = stamp
+            return self._state
+
+    def _read(self, index_dir):
+        meta = _read_semantic_meta(index_dir)
+        if not meta or not meta["rows"]:
+            return None
+        rows, dim = meta["rows"], meta["dim"]
+        matrix = np.memmap(
+            os.path.join(index_dir, SEMANTIC_VECTORS_FILE),
+            dtype=np.float32, mode="r", shape=(rows, dim),
+        )
+        row_case = np.full(rows, -1, dtype=np.int64)
+        for row, case_id in db.session.execute(
+            select(CaseEmbedding.row, CaseEmbedding.case_id).where(CaseEmbedding.row < rows)
+        ):
+            row_case[row] = case_id
+        live = int((row_case >= 0).sum())
+        if not live:
+            return None
+
+        ann = None
+        ann_path = os.path.join(index_dir, SEMANTIC_ANN_FILE)
+        if hnswlib is not None and os.path.exists(ann_path):
+            ann = hnswlib.Index(space="ip", dim=dim)
+            ann.load_index(ann_path, max_elements=rows)
+            ann.set_ef(max(2 * app.config["SEMANTIC_LIMIT"], 64))
+        return SemanticState(matrix, row_case, ann, live)
+
+    def search(self, q, limit):
+        """[(case_id, similitud)] de los `limit` casos más cercanos, mejor primero."""
+        if semantic_dependencies_error():
+            return []
+        state = self._load()
+        if state is None:
+            return []
+        query_vector = embed_texts([q])[0]
+        # Varios fragmentos por caso: se piden más vecinos y se agrupa por caso
+        k = min(limit * 4, state.live)
+
+        rows = None
+        if state.ann is not None:
+            try:
+                labels, distances = state.ann.knn_query(query_vector, k=k)
+                rows, scores = labels[0], 1.0 - distances[0]  # "ip": distancia = 1 - coseno
+            except RuntimeError:
+                pass  # índice desfasado respecto de la matriz: búsqueda exacta
+        if rows is None:
+            scores = state.matrix @ query_vector
+            scores[state.row_case < 0] = -np.inf
+            rows = np.argpartition(-scores, k - 1)[:k]
+            scores = scores[rows]
+
+        best = {}
+        min_score = app.config["SEMANTIC_MIN_SCORE"]
+        for row, score in zip(rows, scores):
+            case_id = int(state.row_case[row])
+            if case_id >= 0 and score >= min_score and score > best.get(case_id, -1.0):
+                best[case_id] = float(score)
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+semantic_index = SemanticIndex()
+
+
+@app.cli.command("embed-cases")
+@click.option("--rebuild", is_flag=True, help="Descartar los embeddings guardados y codificar todo.")
+@click.option("--batch-size", type=int, default=None, help="Fragmentos por lote (por defecto, SEMANTIC_BATCH_SIZE).")
+def embed_cases_command(rebuild, batch_size):
+    """Codificar resúmenes y páginas de PDF para la búsqueda semántica."""
+    init_db()
+    try:
+        stats = embed_cases(rebuild=rebuild, batch_size=batch_size, log=click.echo)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(
+        f"{stats['encoded']} fragmentos codificados, {stats['unchanged']} sin cambios, "
+        f"{stats['removed']} descartados"
+    )
+
+
+def reciprocal_rank_fusion(rankings, k):
+    """
+    Fusionar listas de ids ordenadas (mejor primero) por reciprocal rank
+    fusion: cada lista suma 1 / (k + posición) a sus ids. Devuelve
+    {case_id: puntaje fusionado}, de mayor a menor puntaje.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for position, case_id in enumerate(ranking, start=1):
+            scores[case_id] += 1.0 / (k + position)
+    return {
+        case_id: scores[case_id]
+        for case_id in sorted(scores, key=lambda case_id: (-scores[case_id], case_id))
+    }
+
+
+# --- Generación de datos y caché de facetas ----------------
+
+# Contador que se incrementa tras cada escritura (init_db, create_case) y
+# cuando otro proceso escribió en la base (ver sync_data_version). Las
+# cachés en memoria guardan la generación con la que se armaron y se
+# reconstruyen perezosamente cuando deja de coincidir.
+_data_generation = 0
+_data_generation_lock = threading.Lock()
+
+
+def data_generation():
+    return _data_generation
+
+
+def bump_data_generation():
+    """Invalidar las cachés derivadas de la base; llamar después del commit."""
+    global _data_generation
+    with _data_generation_lock:
+        _data_generation += 1
+
+
+# Conexión propia para PRAGMA data_version (ver sync_data_version)
+_data_version_lock = threading.Lock()
+_data_version_conn = None
+_data_version_seen = None
+# Cambios que confirmó otro proceso: FuzzyIndex, FilterIndex y SuggestIndex
+# se recargan cuando cambia, porque solo ven las escrituras de este proceso
+_external_generation = 0
+
+
+def external_generation():
+    return _external_generation
+
+
+def sync_data_version(local=False):
+    """
+    Incrementar la generación si otro proceso confirmó cambios en la base.
+
+    Los comandos extract-docs y embed-cases (u otro servidor sobre el mismo
+    archivo) escriben desde otro proceso, donde bump_data_generation no
+    llega. PRAGMA data_version cambia cuando otra conexión confirmó algo y
+    es por conexión, así que se lee siempre desde la misma, aparte del pool;
+    cuesta lo mismo que leer una variable.
+
+    Las escrituras de este proceso (otras conexiones del pool) también lo
+    cambian: commit_local_write las registra con local=True, para que no
+    cuenten como externas ni obliguen a recargar los índices en memoria.
+    """
+    global _data_version_conn, _data_version_seen, _external_generation
+    url = db.engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return
+    with _data_version_lock:
+        if _data_version_conn is None:
+            _data_version_conn = sqlite3.connect(url.database, check_same_thread=False)
+        version = _data_version_conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = _data_version_seen is not None and version != _data_version_seen
+        _data_version_seen = version
+        if changed and not local:
+            _external_generation += 1
+    if changed and not local:
+        bump_data_generation()
+
+
+def commit_local_write():
+    """
+    Confirmar una escritura cuyos casos este proceso agrega después a los
+    índices en memoria (seed_cases, ingest_case_chunk, create_case).
+
+    Antes del commit, con la transacción de escritura abierta (ningún otro
+    proceso puede confirmar), se registra lo externo que haya llegado; el
+    cambio de data_version que deja el commit es propio. Solo una escritura
+    externa confirmada entre el commit y esa lectura pasaría por propia.
+    """
+    sync_data_version()
+    db.session.commit()
+    sync_data_version(local=True)
+
+
+@app.before_request
+def _sync_data_version():
+    # Antes del ETag y de las cachés: una escritura externa no deja 304 viejos
+    if request.endpoint != "static":
+        sync_data_version()
+
+
+FacetItem = namedtuple("FacetItem", ["id", "name"])
+Facets = namedtuple("Facets", ["tags", "arbiters", "industries"])
+
+
+class FacetCache:
+    """
+    Listas de etiquetas, árbitros e industrias para los paneles de filtros.
+
+    Solo cambian cuando se escriben casos, así que se cargan una vez por
+    generación de datos y los requests siguientes no consultan la base.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._facets = None
+        self._generation = None
+
+    def get(self):
+        generation = data_generation()
+        if self._facets is not None and self._generation == generation:
+            return self._facets
+
+        with self._lock:
+            if self._facets is None or self._generation != generation:
+                # Guardamos la generación leída *antes* de cargar: si hay una
+                # escritura mientras tanto, el próximo request recarga.
+                self._facets = self._load()
+                self._generation = generation
+            return self._facets
+
+    @staticmethod
+    def _load():
+        tags = [
+            FacetItem(row.id, row.name)
+            for row in Tag.query.with_entities(Tag.id, Tag.name).order_by(Tag.name.asc())
+        ]
+        arbiters = [
+            FacetItem(row.id, row.name)
+            for row in Arbiter.query.with_entities(Arbiter.id, Arbiter.name).order_by(Arbiter.name)
+        ]
+        industries = sorted(
+            i[0] for i in db.session.query(Case.industry).distinct().all() if i[0]
+        )
+        return Facets(tags, arbiters, industries)
+
+
+facet_cache = FacetCache()
+
+
+class DocumentCache:
+    """
+    case_id -> doc_filename para download_case, sin ir a la base en cada
+    descarga. LRU de hasta DOCUMENT_CACHE_SIZE casos; guarda solo casos que
+    existen (también los que no tienen documento, como None), así que pedir
+    ids inventados no la hace crecer. Se vacía cuando cambia la generación.
+    """
+
+    _MISSING = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filenames = OrderedDict()
+        self._generation = None
+
+    def get(self, case_id):
+        """Nombre del documento del caso; None si no tiene o no existe."""
+        generation = data_generation()
+        with self._lock:
+            if self._generation != generation:
+                self._filenames = OrderedDict()
+                self._generation = generation
+            filename = self._filenames.get(case_id, self._MISSING)
+            if filename is not self._MISSING:
+                self._filenames.move_to_end(case_id)
+                return filename
+
+        row = Case.query.with_entities(Case.doc_filename).filter(Case.id == case_id).first()
+        if row is None:
+            return None
+        with self._lock:
+            if self._generation == generation:
+                self._filenames[case_id] = row.doc_filename
+                while len(self._filenames) > app.config["DOCUMENT_CACHE_SIZE"]:
+                    self._filenames.popitem(last=False)
+        return row.doc_filename
+
+
+document_cache = DocumentCache()
+
+
+# --- Índice de filtros en memoria (bitmaps) -----------------
+
+def ids_to_bitmap(ids):
+    """Bitmap como int de Python: el bit n está encendido si el caso n está."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for case_id in ids:
+        buf[case_id >> 3] |= 1 << (case_id & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bitmap_to_ids(bitmap):
+    """Ids de los bits encendidos, en orden ascendente."""
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        # Saltamos bytes vacíos de una vez; los bitmaps filtrados son dispersos
+        while byte:
+            low = byte & -byte
+            ids.append(offset * 8 + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+FilterState = namedtuple(
+    "FilterState",
+    [
+        "all", "tags", "arbiters", "industries", "dates", "date_ids", "counts",
+        "by_case", "links",
+    ],
+)
+# scores: {case_id: relevancia} cuando hubo q (lo agrega _filter_search)
+FilterResult = namedtuple(
+    "FilterResult", ["case_ids", "total", "counts", "scores"], defaults=(None,)
+)
+
+# Facetas en el orden de las tuplas de FilterState.by_case
+FILTER_FACETS = ("tag", "arbiter", "industry")
+
+
+class FilterIndex:
+    """
+    Listas de casos por tag, árbitro e industria guardadas como bitmaps, más
+    las fechas de laudo ordenadas para cortar rangos con bisect.
+
+    Combinar filtros es un AND/OR de enteros y los conteos de facetas un
+    bit_count(), así que search() solo le pide a SQL la página a mostrar.
+    Como FuzzyIndex, se carga completo en la primera búsqueda y las rutas de
+    escritura le agregan los casos nuevos con add_cases(); lo que escribe
+    otro proceso (external_generation) obliga a recargarlo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._generation = None  # external_generation() con la que se cargó
+
+    def _get_state(self):
+        generation = external_generation()
+        state = self._state
+        if state is not None and self._generation == generation:
+            return state
+
+        # Se lee la base con el lock tomado: un add_cases() que llegue durante
+        # la carga espera y se aplica sobre ella, en vez de perderse
+        with self._lock:
+            if self._state is None or self._generation != generation:
+                self._state = self._load()
+                self._generation = generation
+            return self._state
+
+    @staticmethod
+    def _load():
+        rows = Case.query.with_entities(Case.id, Case.industry, Case.fecha_laudo).all()
+
+        tags = defaultdict(list)
+        case_tags_ids = defaultdict(list)
+        for case_id, tag_id in db.session.execute(
+            select(case_tags.c.case_id, case_tags.c.tag_id)
+        ):
+            tags[tag_id].append(case_id)
+            case_tags_ids[case_id].append(tag_id)
+
+        arbiters = defaultdict(list)
+        case_arbiter_ids = defaultdict(list)
+        for case_id, arbiter_id in db.session.execute(
+            select(case_arbiters.c.case_id, case_arbiters.c.arbiter_id)
+        ):
+            arbiters[arbiter_id].append(case_id)
+            case_arbiter_ids[case_id].append(arbiter_id)
+
+        industries = defaultdict(list)
+        for row in rows:
+            if row.industry:
+                industries[row.industry].append(row.id)
+
+        # Casos sin fecha quedan fuera de cualquier rango, como en SQL
+        dated = sorted((row.fecha_laudo, row.id) for row in rows if row.fecha_laudo)
+
+        # Valores de cada caso por faceta, para contar recorriendo un resultado chico
+        by_case = {
+            row.id: (
+                tuple(case_tags_ids.get(row.id, ())),
+                tuple(case_arbiter_ids.get(row.id, ())),
+                (row.industry,) if row.industry else (),
+            )
+            for row in rows
+        }
+
+        state = FilterState(
+            all=ids_to_bitmap(row.id for row in rows),
+            tags={k: ids_to_bitmap(v) for k, v in tags.items()},
+            arbiters={k: ids_to_bitmap(v) for k, v in arbiters.items()},
+            industries={k: ids_to_bitmap(v) for k, v in industries.items()},
+            dates=[d for d, _ in dated],
+            date_ids=[case_id for _, case_id in dated],
+            counts=None,
+            by_case=by_case,
+            links={
+                facet: sum(len(values[i]) for values in by_case.values())
+                for i, facet in enumerate(FILTER_FACETS)
+            },
+        )
+        # Conteos sin filtros (página de inicio), actualizados por add_cases
+        return state._replace(counts=FilterIndex._count(state, state.all, {}))
+
+    def add_cases(self, rows):
+        """
+        Agregar casos recién confirmados sin recargar el índice.
+
+        rows trae (id, industry, fecha_laudo, tag_ids, arbiter_ids). Cada caso
+        entra con un OR en `all` y en los bitmaps de sus tags, árbitros e
+        industria, y su fecha se intercala en el arreglo ordenado. Si alguno
+        ya estaba indexado (se editó) se descarta el índice completo, que la
+        próxima búsqueda vuelve a cargar.
+        """
+        rows = [
+            (case_id, industry, fecha, tuple(dict.fromkeys(tag_ids)),
+             tuple(dict.fromkeys(arbiter_ids)))
+            for case_id, industry, fecha, tag_ids, arbiter_ids in rows
+        ]
+        with self._lock:
+            state = self._state
+            if state is None or not rows:
+                # Sin cargar: la primera búsqueda ya los leerá de la base
+                return
+            new = ids_to_bitmap(row[0] for row in rows)
+            if state.all & new:
+                self._state = None
+                return
+
+            # Los lectores usan el estado anterior sin el lock: se arman
+            # diccionarios y arreglos nuevos y se reemplaza el estado de una vez
+            postings = {
+                "tag": dict(state.tags),
+                "arbiter": dict(state.arbiters),
+                "industry": dict(state.industries),
+            }
+            counts = {facet: dict(values) for facet, values in state.counts.items()}
+            links = dict(state.links)
+            added = defaultdict(list)  # (faceta, valor) -> ids nuevos
+            for case_id, industry, _, tag_ids, arbiter_ids in rows:
+                values = (tag_ids, arbiter_ids, (industry,) if industry else ())
+                # by_case se comparte: los estados anteriores no tienen estos ids
+                state.by_case[case_id] = values
+                for facet, keys in zip(FILTER_FACETS, values):
+                    for key in keys:
+                        added[facet, key].append(case_id)
+            for (facet, key), ids in added.items():
+                postings[facet][key] = postings[facet].get(key, 0) | ids_to_bitmap(ids)
+                counts[facet][key] = counts[facet].get(key, 0) + len(ids)
+                links[facet] += len(ids)
+
+            # Intercalar las fechas nuevas copiando por tramos el arreglo ordenado
+            dates, date_ids, start = [], [], 0
+            for fecha, case_id in sorted((row[2], row[0]) for row in rows if row[2]):
+                pos = bisect_right(state.dates, fecha)
+                dates += state.dates[start:pos]
+                date_ids += state.date_ids[start:pos]
+                dates.append(fecha)
+                date_ids.append(case_id)
+                start = pos
+            dates += state.dates[start:]
+            date_ids += state.date_ids[start:]
+
+            self._state = state._replace(
+                all=state.all | new,
+                tags=postings["tag"],
+                arbiters=postings["arbiter"],
+                industries=postings["industry"],
+                dates=dates,
+                date_ids=date_ids,
+                counts=counts,
+                links=links,
+            )
+
+    @staticmethod
+    def _count(state, base, selected):
+        """
+        Conteos por tag, árbitro e industria sobre el bitmap base.
+
+        Cada faceta se cuenta sobre los casos que cumplen todos los filtros menos
+        el suyo: como la selección múltiple dentro de una faceta es un OR, así el
+        número junto a cada casilla es lo que se obtendría al marcarla.
+
+        Con pocos casos se recorren sus valores (by_case), en tiempo
+        proporcional al resultado; con muchos, un AND + bit_count() por valor
+        de la faceta sale más barato que recorrerlos uno por uno.
+        """
+        cases = state.all.bit_count() or 1
+        words = state.all.bit_length() >> 6
+        ids_by_bitmap = {}
+        counts = {}
+        for position, (facet, postings) in enumerate(
+            zip(FILTER_FACETS, (state.tags, state.arbiters, state.industries))
+        ):
+            matched = base
+            for name, bitmap in selected.items():
+                if name != facet:
+                    matched &= bitmap
+            counts[facet] = {}
+            if not matched:
+                continue
+
+            # Costos medidos (µs): ~0.3 por (caso, valor) recorrido; ~1 más una
+            # centésima por palabra de 64 bits del corpus por cada bit_count()
+            walk_cost = 0.3 * matched.bit_count() * state.links[facet] / cases
+            scan_cost = len(postings) * (1 + words / 100)
+            if walk_cost < scan_cost:
+                if matched not in ids_by_bitmap:
+                    ids_by_bitmap[matched] = bitmap_to_ids(matched)
+                counter = Counter()
+                for case_id in ids_by_bitmap[matched]:
+                    counter.update(state.by_case[case_id][position])
+                counts[facet] = dict(counter)
+                continue
+
+            for key, bitmap in postings.items():
+                n = (bitmap & matched).bit_count()
+                if n:
+                    counts[facet][key] = n
+        return counts
+
+    def search(self, candidate_ids=None, date_from=None, date_to=None,
+               tag_ids=(), arbiter_ids=(), industries=()):
+        """
+        Aplicar los filtros y devolver FilterResult(case_ids, counts).
+
+        candidate_ids restringe a los casos que devolvió q. case_ids sale en
+        orden ascendente, o None si no hay q ni ningún filtro activo (todos);
+        con candidate_ids siempre es una lista, aunque q coincida con todo el
+        corpus. total es su cantidad, exacta y sin un COUNT(*) en SQL.
+        """
+        state = self._get_state()
+
+        base = state.all
+        if candidate_ids is not None:
+            base &= ids_to_bitmap(candidate_ids)
+        if date_from or date_to:
+            lo = bisect_left(state.dates, date_from) if date_from else 0
+            hi = bisect_right(state.dates, date_to) if date_to else len(state.dates)
+            base &= ids_to_bitmap(state.date_ids[lo:hi])
+
+        selected = {}
+        for facet, postings, keys in (
+            ("tag", state.tags, tag_ids),
+            ("arbiter", state.arbiters, arbiter_ids),
+            ("industry", state.industries, industries),
+        ):
+            if keys:
+                bitmap = 0
+                for key in keys:
+                    bitmap |= postings.get(key, 0)
+                selected[facet] = bitmap
+
+        if candidate_ids is None and base == state.all and not selected:
+            return FilterResult(None, state.all.bit_count(), state.counts)
+
+        matched = base
+        for bitmap in selected.values():
+            matched &= bitmap
+        case_ids = bitmap_to_ids(matched)
+        return FilterResult(case_ids, len(case_ids), self._count(state, base, selected))
+
+
+filter_index = FilterIndex()
+
+
+# --- DB init / datos de ejemplo ------------------------------
+
+def parse_arbiter_names(arb_str):
+    """
+    Nombres de árbitros a partir del texto de display. Formatos esperados:
+    "Árbitro único: Nombre Apellido"
+    "Tribunal: Nombre1, Nombre2, Nombre3"
+    """
+    arb_str = arb_str or ""
+    arb_names = []
+    if arb_str.startswith("Árbitro único:"):
+        raw_name = arb_str.replace("Árbitro único:", "").strip()
+        if raw_name:
+            arb_names.append(raw_name)
+    elif arb_str.startswith("Tribunal:"):
+        raw_part = arb_str.replace("Tribunal:", "").strip()
+        # Split por coma
+        parts = [p.strip() for p in raw_part.split(",") if p.strip()]
+        arb_names.extend(parts)
+    else:
+        # Fallback por si no tiene prefijo, usar todo el string o nada
+        if arb_str:
+            arb_names.append(arb_str.strip())
+    return arb_names
+
+
+def init_db():
+    """Crear tablas y sembrar datos demo si están vacías."""
+    db.create_all()
+    migrate_schema()
+    fts_created = init_fts()
+
+    # Los casos ya sembrados se comparan por seed_hash (ver seed_cases)
+
+    # Datos provenientes de tu JSON (adaptados a Python) + árbitro + keywords demo
+    cases_data = [
+        {
+            "industry": "Consumo / Servicios",
+            "radicado": "2024 A 0052",
+            "fecha_laudo": "2025-04-30",
+            "title": "Leonel Chica vs. Loyalty World S.A.S.",
+            "arbiter": "Árbitro único: Ana María López",
+            "keywords": "consumo dolo afiliacion credito",
+            "content": """En el plano procesal, el laudo analiza la existencia, validez y oponibilidad del pacto arbitral contenido en el Contrato de Afiliación No. MED1298, la jurisdicción y competencia del tribunal conforme a la Ley 1563 de 2012, así como la correcta integración del tribunal, la capacidad de las partes y el cumplimiento de los presupuestos procesales (demanda en forma, legitimación en la causa, integración del contradictorio y término del proceso). También se valora la inactividad de la parte convocada, que no contestó la demanda ni asistió a las audiencias, y las consecuencias probatorias de su incomparecencia y silencio frente a las afirmaciones de la parte convocante.
+
+En el plano sustancial, el tribunal estudia si procede declarar la nulidad relativa del contrato por dolo como vicio del consentimiento, a partir de la información engañosa y las maniobras desplegadas por los empleados de Loyalty World para inducir al demandante a suscribir un contrato de afiliación distinto a lo ofrecido verbalmente. Igualmente examina el eventual incumplimiento de los deberes de información consagrados en el Estatuto del Consumidor, la eficacia de la cláusula de permanencia mínima de cuatro años considerada como cláusula abusiva, y las consecuencias económicas derivadas del crédito de consumo gestionado con el Banco de Bogotá (cuotas, intereses, seguros y demás cargos) para efectos de la restitución de lo pagado y la indemnización de perjuicios.""",
+            "path": "2024 A 0052 30-04-2025.pdf",
+            "tags": [
+                "pacto_arbitral",
+                "competencia_tribunal",
+                "presupuestos_procesales",
+                "incomparecencia_demandado",
+                "nulidad_relativa_por_dolo",
+                "estatuto_consumidor",
+                "clausula_abusiva_permanencia_minima",
+                "informacion_al_consumidor",
+            ],
+        },
+        {
+            "industry": "Construcción",
+            "radicado": "2024 A 0036",
+            "fecha_laudo": "2025-02-17",
+            "title": "Construcciones A Plomo S.A.S. vs. Promotora & Constructora de Proyectos S.A.S.",
+            "arbiter": "Tribunal: Carlos Restrepo, Laura Vélez, Jorge Ramírez",
+            "keywords": "obra retenido pago indemnizacion",
+            "content": """En el plano procesal, el laudo examina la existencia y alcance del pacto arbitral contenido en los contratos de obra 024 – Portello y 033 – Oz, así como la competencia del tribunal bajo la Ley 1563 de 2012 y el Reglamento de Arbitraje Social de la Cámara de Comercio de Medellín. Se verifica el cumplimiento de los presupuestos procesales y materiales (capacidad, representación, demanda en forma, legitimación en la causa, interés para obrar, ausencia de cosa juzgada, caducidad, transacción o conciliación) y se analiza el trámite arbitral en rebeldía de la convocada, resaltando las consecuencias de la falta de contestación de la demanda y de la inactividad procesal de la demandada, en particular la confesión ficta prevista en el artículo 97 del Código General del Proceso, así como la fijación, cómputo y prórroga del término para proferir el laudo en un escenario de arbitraje social.
+
+En el plano sustancial, el tribunal estudia la relación contractual de obra civil entre las partes, centrando el problema jurídico en determinar si las sumas retenidas (el 10% del valor de los contratos) debían ser reembolsadas al contratista una vez terminadas las obras. A partir de la cláusula de forma de pago y del parágrafo sobre el retenido, se define la naturaleza de estas sumas como valores causados y reconocidos en actas de corte de obra y comunicaciones posteriores, sometidos a una condición temporal y a la elaboración de un memorando de entrega de retenido que el contratante nunca expidió dentro del plazo de un mes. El laudo concluye, con apoyo en el principio pacta sunt servanda y en la buena fe contractual, que la convocada incumplió la carga de emitir oportunamente dicho memorando y no probó la supuesta menor obra ejecutada ni el pago en exceso, por lo que debe reembolsar los valores retenidos debidamente indexados, rechazando la compensación unilateral pretendida por la contratante.""",
+            "path": "2024 A 0036 17-02-2025.pdf",
+            "tags": [
+                "pacto_arbitral",
+                "competencia_tribunal",
+                "rebeldia_demandado",
+                "confesion_ficta",
+                "contrato_de_obra",
+                "retenido_contractual",
+                "incumplimiento_pago",
+                "indexacion_monetaria",
+            ],
+        },
+        {
+            "industry": "Inmobiliario",
+            "radicado": "2024 A 0020",
+            "fecha_laudo": "2025-04-10",
+            "title": "INVERBETANCUR S.A.S. vs. Guillermo León Ruiz Tamayo y Altagracia del Socorro Gutiérrez Restrepo",
+            "arbiter": "Árbitro único: Beatriz Cárdenas",
+            "keywords": "arrendamiento estacion_servicio ambiente clausula_penal",
+            "content": """En el plano procesal, el laudo verifica de manera sistemática los presupuestos procesales de capacidad, demanda en forma, competencia del tribunal y legitimación en la causa para la demanda principal y la reconvención, a partir de la cláusula compromisoria del contrato de arrendamiento y su modificación en un trámite anterior. Se describen las actuaciones relevantes del trámite (admisión de la demanda, integración de la litis con la reconvención, decreto y práctica de pruebas, alegatos y saneamiento), se analiza la arbitrabilidad subjetiva y objetiva, y se estudia en detalle la excepción de cosa juzgada parcial frente a dos laudos arbitrales previos, contrastando identidad de partes, objeto y causa a la luz del artículo 302 del Código General del Proceso y la jurisprudencia de la Corte Suprema de Justicia.
+
+En el plano sustancial, el tribunal centra la controversia en el contrato de arrendamiento del lote destinado a estación de servicio de combustible y en la imputación recíproca de incumplimientos: de un lado, la arrendataria sostiene que los arrendadores perturbaron el uso pacífico del inmueble mediante cambios de candados, restricciones de acceso a agua e instalaciones, quejas ante la autoridad ambiental y negativa de permisos para muestras, lo que habría generado pérdida de utilidades, costos adicionales y activación de la cláusula penal; del otro, los arrendadores alegan que la arrendataria incumplió obligaciones de mantenimiento, uso adecuado y obtención y conservación de permisos ambientales, causando sanciones y deterioro del bien, así como cánones dejados de pagar. El tribunal estudia el alcance de las obligaciones contractuales de cada parte, la carga probatoria sobre los hechos alegados, la procedencia de las indemnizaciones reclamadas y la aplicación de la cláusula penal y del juramento estimatorio en este contexto.""",
+            "path": "2024 A 0020 10-04-2025.pdf",
+            "tags": [
+                "clausula_compromisoria",
+                "competencia_tribunal",
+                "cosa_juzgada_parcial",
+                "demanda_de_reconvencion",
+                "contrato_de_arrendamiento",
+                "incumplimiento_contractual",
+                "obligaciones_ambientales",
+                "clausula_penal",
+            ],
+        },
+        {
+            "industry": "Construcción",
+            "radicado": "2024 A 0013",
+            "fecha_laudo": "2025-04-09",
+            "title": "CONSTRUCTIVAMENTE S.A.S. vs. Arturo García Isaac",
+            "arbiter": "Tribunal: Diana Ruiz, Camilo Salazar, Paula Hoyos",
+            "keywords": "administracion_delegada vivienda sobrecostos cuentas",
+            "content": """En el plano procesal, el laudo examina la existencia, alcance y posterior modificación de la cláusula compromisoria del contrato de administración delegada para el proyecto Green Mecano – Casa Arturo García, así como la correcta integración del tribunal y su competencia subjetiva y objetiva conforme a la Ley 1563 de 2012. Se estudia el trámite de la demanda principal y de la demanda de reconvención, la admisión de ambas, los recursos contra el auto admisorio, las excepciones de mérito, la audiencia de conciliación, la fijación y pago de gastos, la práctica de una amplia actividad probatoria (documentos, testimonios, interrogatorios, dictámenes periciales, ratificación de documentos y juramento estimatorio) y la posterior reconstrucción parcial del expediente por problemas en la plataforma MASCINFO. El tribunal también analiza el decreto de pruebas de oficio, la incidencia de la acción de tutela promovida contra dichas decisiones probatorias y concluye sobre la validez de la actuación y la concurrencia de los presupuestos procesales para dictar un laudo de mérito.
+
+En el plano sustancial, el tribunal centra la controversia en el contrato de administración delegada de obra suscrito para la construcción de la vivienda Green Mecano – Casa Arturo García y en la imputación recíproca de incumplimientos: de un lado, CONSTRUCTIVAMENTE S.A.S. reclama el pago de un saldo importante por concepto de obra ejecutada y honorarios, apoyándose en los sobrecostos derivados de cambios de diseño, mayores cantidades de obra y un porcentaje de avance cercano al 95–99%; de otro lado, ARTURO GARCÍA ISAAC sostiene que cumplió integralmente sus obligaciones de pago, incluidos aportes al fondo rotatorio y suministro de materiales, y que fue el contratista quien abandonó la obra sin terminarla, sin rendir cuentas claras ni entregar información presupuestal y contable acorde con lo pactado. El laudo aborda la naturaleza jurídica del contrato de administración delegada, el régimen de riesgos y sobrecostos, el alcance de las obligaciones de rendición de cuentas y de entrega de la obra terminada y habitable, la procedencia de la excepción de contrato no cumplido y del cobro de mayores sumas, así como la legitimidad de la terminación anticipada y la prueba de los sobrecostos y perjuicios reclamados por el convocado en reconvención.""",
+            "path": "2024 A 0013 09-04-2025.pdf",
+            "tags": [
+                "clausula_compromisoria",
+                "competencia_tribunal",
+                "demanda_de_reconvencion",
+                "reconstruccion_expediente",
+                "contrato_administracion_delegada",
+                "contrato_de_obra",
+                "incumplimiento_contractual",
+                "sobrecostos_obra",
+            ],
+        },
+        {
+            "industry": "Seguros",
+            "radicado": "2024 A 0012",
+            "fecha_laudo": "2025-04-09",
+            "title": "C.I. HERMECO S.A. vs. Allianz Seguros S.A.",
+            "arbiter": "Tribunal: Jorge Nieto, Andrea Pérez, Luis Martínez",
+            "keywords": "seguro infidelidad estafa cobertura exclusiones",
+            "content": """En el plano procesal, el laudo constata el cumplimiento de los presupuestos procesales (demanda en forma, capacidad, representación y legitimación de las partes) y la validez del pacto arbitral contenido en la póliza de seguro de infidelidad y riesgos financieros, así como la correcta integración del tribunal y su competencia objetiva y subjetiva conforme a la Ley 1563 de 2012. Se reseñan las principales actuaciones: presentación y subsanación de la demanda, contestación con excepciones de mérito, objeciones al juramento estimatorio, reforma de la demanda y su contestación, fijación de gastos y honorarios, celebración de la primera audiencia de trámite donde se declara la competencia, decreto y práctica de pruebas documentales, testimoniales, interrogatorios y exhibición de documentos, así como las discusiones sobre la eventual renuencia en la exhibición y el alcance del artículo 267 del Código General del Proceso, concluyendo que no se configuran nulidades ni causales que impidan un pronunciamiento de mérito.
+
+En el plano sustancial, el tribunal examina el contrato de seguro de infidelidad y riesgos financieros (póliza No. 022729240/0) suscrito entre HERMECO y ALLIANZ, centrando la controversia en la ocurrencia del siniestro derivado de una estafa por suplantación de la representante legal de HERMECO y en la procedencia de la cobertura bajo el amparo de falsificación extendida. Se analizan las pretensiones de HERMECO para que se declare injustificada la objeción de la aseguradora y se ordene el pago del límite asegurado, frente a las excepciones de mérito de ALLIANZ, que sostienen que las pérdidas están excluidas por la falta de segregación de funciones y de doble control en las transferencias (exclusiones 26 y 31), así como por otros límites y deducibles del contrato. El tribunal interpreta de manera restrictiva el clausulado de la póliza, el alcance técnico del control dual y la segregación de funciones según los manuales y prácticas internas de HERMECO, valora la prueba sobre la forma real en que se ejecutaron las operaciones bancarias y define si se configuraron o no las exclusiones invocadas, así como la procedencia de los intereses moratorios, la suma asegurada reclamada y las demás consecuencias patrimoniales del siniestro.""",
+            "path": "2024 A 0012 09-04-2025.pdf",
+            "tags": [
+                "clausula_compromisoria",
+                "presupuestos_procesales",
+                "competencia_tribunal",
+                "exhibicion_documental",
+                "contrato_de_seguro",
+                "poliza_infidelidad_y_riesgos_financieros",
+                "exclusiones_de_cobertura",
+                "interpretacion_restrictiva_seguro",
+            ],
+        },
+        {
+            "industry": "Inmobiliario",
+            "radicado": "2024 A 0006",
+            "fecha_laudo": "2025-05-05",
+            "title": "INVERSIONES CONSUMAR S.A.S. vs. OPERADORA COLOMBIANA DE CINES S.A.S.",
+            "arbiter": "Tribunal: Juliana Torres, Felipe Arango, Ricardo Mejía",
+            "keywords": "arrendamiento local_comercial renovacion desahucio canon",
+            "content": """En el plano procesal, el laudo verifica la existencia, validez, eficacia y oponibilidad de la cláusula compromisoria del contrato de arrendamiento del local comercial 330 del Centro Comercial City Plaza, así como la competencia objetiva y subjetiva del tribunal para conocer las pretensiones de la demanda principal y de la demanda de reconvención, con la salvedad de la pretensión relativa a la comisión para la entrega del inmueble. Se detalla el trámite arbitral (admisión de la demanda, contestación con objeción al juramento estimatorio, demanda de reconvención, traslados, fijación de gastos, primera audiencia de trámite, decreto y práctica de pruebas documentales, testimoniales, interrogatorios y peritajes, así como sucesivas audiencias de pruebas y alegatos), se aprecia la tacha de sospecha frente a un testigo relacionado con el apoderado de la convocante conforme al artículo 211 del Código General del Proceso y a la jurisprudencia constitucional, y se concluye que, pese a dicho interés, su testimonio solo puede valorarse con mayor rigor dentro del conjunto probatorio, sin que se configure nulidad ni vicio procesal que impida proferir la decisión de fondo.
+
+En el plano sustancial, el tribunal centra el debate en la existencia, vigencia y alcances del contrato de arrendamiento de local comercial suscrito en 2013 y modificado por el Otrosí No. 1 de 2020, a partir del cual se discute si el vínculo terminó el 17 de septiembre de 2023, como sostiene la arrendadora, o si se renovó en los términos de los artículos 518 y 520 del Código de Comercio, como alega la arrendataria. Para ello, analiza el carácter tuitivo del régimen de arrendamiento de local comercial, la distinción entre prórroga y renovación, la naturaleza de la cláusula tercera del Otrosí No. 1 y su posible ineficacia por contrariar normas imperativas (artículo 524 del Código de Comercio), así como las comunicaciones cruzadas sobre la renovación, la alegada necesidad de desahucio, los señalamientos de mala fe y abuso del derecho, y la procedencia de las pretensiones principales y subsidiarias relativas a la restitución del inmueble, la cláusula penal, la regulación judicial del canon de arrendamiento posterior al 18 de septiembre de 2023, los intereses moratorios y la fijación del valor del canon con apoyo en los diversos dictámenes periciales de parte y de contradicción.""",
+            "path": "2024 A 0006 05-05-2025.pdf",
+            "tags": [
+                "clausula_compromisoria",
+                "competencia_tribunal",
+                "demanda_de_reconvencion",
+                "tacha_de_testigo",
+                "contrato_de_arrendamiento",
+                "derecho_de_renovacion",
+                "desahucio_comercial",
+                "canon_de_arrendamiento",
+            ],
+        },
+        {
+            "industry": "Inmobiliario",
+            "radicado": "2022 A 0048",
+            "fecha_laudo": "2025-01-24",
+            "title": "LUZ INDELY MEJÍA BERRÍO vs. HÉCTOR GIOVANNY CASTAÑO DÍAZ, JUAN CARLOS BEDOYA VALENCIA y PAULA ANDREA BEDOYA VALENCIA (litisconsorte necesaria)",
+            "arbiter": "Árbitro único: Sebastián Herrera",
+            "keywords": "promesa_permuta nulidad_relativa inmueble frutos",
+            "content": """En el plano procesal, el tribunal analiza la existencia, validez y alcance de las cláusulas compromisorias incluidas tanto en la promesa inicial como en la nota aclaratoria, para afirmar su competencia frente a todos los sujetos involucrados, incluyendo la integración de Paula Andrea Bedoya Valencia como litisconsorte necesaria en el polo pasivo por su doble condición de promitente compradora y apoderada general de uno de los demandados. Se estudian las excepciones de mérito relacionadas con la falta de conciliación como requisito de procedibilidad, la alegada falta de competencia, la indebida integración del contradictorio, la existencia de pleito acabado, compensación, prejudicialidad y otras defensas procesales, concluyendo que varias de ellas carecen de soporte fáctico y que la referencia a la conciliación se hizo con base en una ley ya derogada (Ley 640 de 2001) frente a la entrada en vigor de la Ley 2220 de 2022. Igualmente se abordan las medidas cautelares sobre el inmueble, las solicitudes de amparo de pobreza, las tachas de sospecha a testigos cercanos a las partes y las suspensiones convencionales del proceso, llevando al saneamiento integral del trámite y a la constatación de que no existen nulidades que impidan decidir de fondo.
+
+En el plano sustancial, el tribunal concluye que el negocio denominado por las partes contrato de promesa de compraventa, que en realidad se estructura como una promesa de permuta de lote por unidades inmobiliarias futuras, complementada con una nota aclaratoria, carece de validez por no cumplir los requisitos legales de la promesa de contrato, por lo que se declara la nulidad del pacto y se descarta cualquier análisis de incumplimiento bilateral. A partir de esa nulidad, se ordena la restitución recíproca de las prestaciones: la demandante recupera la plena propiedad del inmueble identificado originalmente con la matrícula 001-693546, hoy 001-1288992 tras el englobe, con todas sus accesiones y edificaciones, mientras que debe restituir a los demandados las sumas recibidas por precio y financiación del proyecto, y estos son condenados a pagar a la actora los frutos percibidos del bien durante el periodo comprendido entre la presentación de la demanda y la fecha del laudo. El tribunal deja a salvo eventuales reclamaciones sobre el valor de las mejoras útiles y las relaciones con terceros acreedores hipotecarios, indicando que esas controversias tendrían que ventilarse en procesos judiciales distintos.""",
+            "path": "2022 A 0048 22-01-2025.pdf",
+            "tags": [
+                "clausula_compromisoria",
+                "competencia_tribunal",
+                "litisconsorcio_necesario",
+                "medidas_cautelares",
+                "promesa_de_compraventa",
+                "promesa_de_permuta",
+                "nulidad_absoluta",
+                "restitucion_de_prestaciones",
+                "mejoras_utiles",
+            ],
+        },
+    {
+        "industry": "Societario",
+        "radicado": "2022 A 0063",
+        "fecha_laudo": "2024-11-28",
+        "title": "ORION HOLDINGS S.A.S. vs. Lleras Holdings S.A.S., Bradley H. Hinkelman, Propiedad Raíz Casacol S.A.S. y Camila Caycedo Prieto",
+        "content": (
+            "En el plano procesal, el laudo arbitral resalta la existencia y alcance de la cláusula "
+            "compromisoria estatutaria de Lleras Holdings S.A.S. y la competencia del tribunal para "
+            "conocer no solo de las controversias derivadas del contrato social, sino también de las "
+            "diferencias relacionadas con el acuerdo de accionistas, en el marco de una coligación negocial. "
+            "Se estudian la regularidad de la convocatoria y celebración de la asamblea, la integración de "
+            "litisconsortes (incluida la participación de la usufructuaria de acciones), la reforma y "
+            "admisión de la demanda, las excepciones de mérito sobre indebida acumulación de pretensiones "
+            "y falta de competencia, así como la inexistencia de nulidades procesales que impidieran un "
+            "pronunciamiento de fondo. El tribunal analiza además el comportamiento procesal de las partes, "
+            "la admisión de la demanda reformada, la contestación con excepciones y la fijación del término "
+            "del proceso conforme a la Ley 1563 de 2012.\n\n"
+            "En el plano sustancial, la controversia gira en torno a la impugnación de las decisiones de la "
+            "asamblea de accionistas del 14 de octubre de 2022 (Acta No. 11), mediante las cuales se modificó "
+            "la composición de la junta directiva y se redujo el número de miembros de cinco (5) a cuatro (4), "
+            "con impacto directo en la posibilidad de que Orion designara la mayoría de los integrantes del órgano. "
+            "La convocante alega abuso del derecho al voto por parte de Bradley H. Hinkelman, Propiedad Raíz "
+            "Casacol S.A.S. y Camila Caycedo, así como una estrategia para notificar en el último momento el "
+            "pago del crédito de Rohan y otorgar un usufructo de acciones que permitiera configurar una mayoría "
+            "artificial en la asamblea. El tribunal examina el alcance del acuerdo de accionistas, la incidencia "
+            "del contrato de línea de crédito en el cómputo de votos, los requisitos del abuso del derecho al voto, "
+            "y las pretensiones de nulidad/ineficacia de las decisiones sociales y de revocatoria del registro del "
+            "Acta No. 11 ante la Cámara de Comercio, a la luz de la buena fe, la protección del equilibrio societario "
+            "y la doctrina sobre contratos coligados."
+        ),
+        "path": "2022 A 0063 28-11-2024.pdf",
+        "tags": [
+            "clausula_compromisoria",
+            "pacto_arbitral_estatutario",
+            "competencia_tribunal",
+            "coligacion_negocial",
+            "contratos_coligados",
+            "impugnacion_de_decisiones_sociales",
+            "abuso_del_derecho_al_voto",
+            "acuerdo_de_accionistas",
+            "usufructo_de_acciones"
+            ]
         },
     
     {
@@ -710,256 +2746,1227 @@ En el plano sustancial, el tribunal concluye que el negocio denominado por las p
         }
     ]
 
-    for item in cases_data:
-        # Check if case exists: Delete it to ensure fresh example data (fix bad associations)
-        existing_case = Case.query.filter_by(radicado=item["radicado"]).first()
-        if existing_case:
-            db.session.delete(existing_case)
-            # We don't commit here, we commit at the end, but delete needs to be flushed? 
-            # SQLAlchemy handles this in session.
-
-
-        fecha_laudo = datetime.strptime(item["fecha_laudo"], "%Y-%m-%d").date()
-
-        tag_objects = []
-        for tag_name in item["tags"]:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            tag_objects.append(tag)
-
-        # ARBITERS (Parsing) - Dedented to be outside tag loop
-        # Formatos esperados:
-        # "Árbitro único: Nombre Apellido"
-        # "Tribunal: Nombre1, Nombre2, Nombre3"
-        arb_str = item.get("arbiter", "")
-        arb_names = []
-        if arb_str.startswith("Árbitro único:"):
-            raw_name = arb_str.replace("Árbitro único:", "").strip()
-            if raw_name:
-                arb_names.append(raw_name)
-        elif arb_str.startswith("Tribunal:"):
-            raw_part = arb_str.replace("Tribunal:", "").strip()
-            # Split por coma
-            parts = [p.strip() for p in raw_part.split(",") if p.strip()]
-            arb_names.extend(parts)
-        else:
-            # Fallback por si no tiene prefijo, usar todo el string o nada
-            if arb_str:
-                arb_names.append(arb_str.strip())
-        
-        arbiter_objects = []
-        for a_name in arb_names:
-            a_obj = Arbiter.query.filter_by(name=a_name).first()
-            if not a_obj:
-                a_obj = Arbiter(name=a_name)
-                db.session.add(a_obj)
-            arbiter_objects.append(a_obj)
-
-        case = Case(
-            radicado=item["radicado"],
-            fecha_laudo=fecha_laudo,
-            title=item["title"],
-            content=item["content"],
-            doc_filename=item["path"],
-            arbiter=item.get("arbiter"),  # Guardamos el string original para display simple
-            keywords=item.get("keywords"),
-            industry=item.get("industry"),
-            tags=tag_objects,
-            arbiters=arbiter_objects,
+    seed_cases(cases_data, rebuild_fts=fts_created)
+
+
+def seed_hash(item):
+    """Huella del dato de ejemplo: cambia si cambia cualquier campo o tag."""
+    canonical = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _names_to_objects(model, names):
+    """{nombre: objeto} con una sola consulta; los que faltan se crean."""
+    names = set(names)
+    if not names:
+        return {}
+    objects = {obj.name: obj for obj in model.query.filter(model.name.in_(names))}
+    for name in names - objects.keys():
+        objects[name] = model(name=name)
+        db.session.add(objects[name])
+    return objects
+
+
+def seed_cases(cases_data, rebuild_fts=False):
+    """
+    Sembrar cases_data de forma incremental e idempotente, por radicado:
+    los casos cuyo seed_hash no cambió no se tocan, los que cambiaron se
+    actualizan en su lugar (mismo id; el ORM solo escribe las asociaciones
+    que difieren) y los nuevos se insertan. Con la base ya sembrada son un
+    par de consultas y ninguna escritura.
+    """
+    stored = {}
+    for case_id, radicado, content_hash in db.session.execute(
+        select(Case.id, Case.radicado, Case.content_hash).order_by(Case.id)
+    ):
+        stored.setdefault(radicado, (case_id, content_hash))
+
+    # Un radicado repetido en cases_data se siembra una sola vez (el último)
+    pending = []
+    for item in {item["radicado"]: item for item in cases_data}.values():
+        item_hash = seed_hash(item)
+        case_id, content_hash = stored.get(item["radicado"], (None, None))
+        if content_hash != item_hash:
+            pending.append((case_id, item_hash, item))
+
+    if not pending:
+        if rebuild_fts:
+            sync_case_fts()
+            db.session.commit()
+        return
+
+    tags = _names_to_objects(Tag, (name for _, _, item in pending for name in item["tags"]))
+    arbiters = _names_to_objects(
+        Arbiter,
+        (name for _, _, item in pending for name in parse_arbiter_names(item.get("arbiter"))),
+    )
+    existing = {
+        case.id: case
+        for case in Case.query.filter(
+            Case.id.in_([case_id for case_id, _, _ in pending if case_id is not None])
+        )
+    }
+
+    changed = []
+    for case_id, item_hash, item in pending:
+        case = existing.get(case_id)
+        if case is None:
+            case = Case()
+            db.session.add(case)
+
+        case.radicado = item["radicado"]
+        case.fecha_laudo = datetime.strptime(item["fecha_laudo"], "%Y-%m-%d").date()
+        case.title = item["title"]
+        case.content = item["content"]
+        case.doc_filename = item["path"]
+        case.arbiter = item.get("arbiter")  # Guardamos el string original para display simple
+        case.keywords = item.get("keywords")
+        case.industry = item.get("industry")
+        case.content_hash = item_hash
+        case.tags = [tags[name] for name in dict.fromkeys(item["tags"])]
+        case.arbiters = [
+            arbiters[name] for name in dict.fromkeys(parse_arbiter_names(item.get("arbiter")))
+        ]
+        changed.append(case)
+
+    db.session.flush()
+    sync_case_fts(None if rebuild_fts else [case.id for case in changed])
+    commit_local_write()
+
+    for case in changed:
+        fuzzy_index.add(case.id, case.title_norm, case.keywords_norm, case.industry_norm)
+    filter_index.add_cases(
+        (c.id, c.industry, c.fecha_laudo, [t.id for t in c.tags], [a.id for a in c.arbiters])
+        for c in changed
+    )
+    suggest_index.add_cases((c.id, c.radicado, c.title, c.industry) for c in changed)
+    suggest_index.add_names("tag", ((t.id, t.name) for t in tags.values()))
+    suggest_index.add_names("arbiter", ((a.id, a.name) for a in arbiters.values()))
+    bump_data_generation()
+
+
+# --- Proyección de resultados -------------------------------
+
+# La lista de resultados solo muestra estos campos y los primeros caracteres
+# del resumen; content completo (varios KB) no sale de SQLite.
+RESULT_SNIPPET_CHARS = 280
+
+RESULT_COLUMNS = (
+    Case.id,
+    Case.title,
+    Case.radicado,
+    Case.fecha_laudo,
+    Case.arbiter,
+    Case.doc_filename,
+    # Un carácter de más para saber si hay que poner "..."
+    func.substr(Case.content, 1, RESULT_SNIPPET_CHARS + 1).label("snippet"),
+)
+
+CaseResult = namedtuple(
+    "CaseResult",
+    ["id", "title", "radicado", "fecha_laudo", "arbiter", "doc_filename",
+     "snippet", "truncated", "tags", "highlight", "page", "page_highlight"],
+)
+
+
+def load_results(rows, q=""):
+    """
+    Convertir las filas de RESULT_COLUMNS de una página en CaseResult, con
+    los nombres de tags de toda la página traídos en una sola consulta.
+
+    Con q y FTS5 disponible, agrega los fragmentos resaltados del resumen
+    (highlight) y de la mejor página del PDF (page, page_highlight), tomados
+    del índice solo para los casos de la página.
+    """
+    tags_by_case = defaultdict(list)
+    if rows:
+        tag_rows = db.session.execute(
+            select(case_tags.c.case_id, Tag.name)
+            .join(Tag, Tag.id == case_tags.c.tag_id)
+            .where(case_tags.c.case_id.in_([row.id for row in rows]))
+            .order_by(case_tags.c.case_id, Tag.name)
+        )
+        for case_id, name in tag_rows:
+            tags_by_case[case_id].append(name)
+
+    highlights = page_highlights = {}
+    if q and rows and fts_available():
+        ids = [row.id for row in rows]
+        highlights = fts_snippets(q, ids)
+        page_highlights = fts_page_snippets(q, ids)
+
+    return [
+        CaseResult(
+            id=row.id,
+            title=row.title,
+            radicado=row.radicado,
+            fecha_laudo=row.fecha_laudo,
+            arbiter=row.arbiter,
+            doc_filename=row.doc_filename,
+            snippet=row.snippet[:RESULT_SNIPPET_CHARS],
+            truncated=len(row.snippet) > RESULT_SNIPPET_CHARS,
+            tags=tags_by_case[row.id],
+            highlight=highlights.get(row.id),
+            page=page_highlights.get(row.id, (None, None))[0],
+            page_highlight=page_highlights.get(row.id, (None, None))[1],
+        )
+        for row in rows
+    ]
+
+
+# --- Paginación por cursor (keyset) ------------------------
+
+# Cada orden de search() se pagina por (clave, id). La clave de fecha pasa por
+# COALESCE para que los casos sin fecha tengan un valor comparable ("") y
+# queden donde SQLite pone los NULL: al principio en ASC y al final en DESC.
+_FECHA_KEY = func.coalesce(type_coerce(Case.fecha_laudo, db.String), "")
+
+# Índice sobre la misma expresión que ordena (y que compara el cursor), para
+# que fecha_desc / fecha_asc recorran el índice en vez de ordenar la tabla
+db.Index("ix_case_fecha_sort", _FECHA_KEY, Case.id)
+
+SortKey = namedtuple("SortKey", ["column", "descending", "value"])
+
+SORT_KEYS = {
+    "fecha_desc": SortKey(
+        _FECHA_KEY, True, lambda c: c.fecha_laudo.isoformat() if c.fecha_laudo else ""
+    ),
+    "fecha_asc": SortKey(
+        _FECHA_KEY, False, lambda c: c.fecha_laudo.isoformat() if c.fecha_laudo else ""
+    ),
+    "radicado_asc": SortKey(Case.radicado, False, lambda c: c.radicado),
+}
+
+KeysetPage = namedtuple(
+    "KeysetPage", ["items", "total", "has_prev", "has_next", "prev_cursor", "next_cursor"]
+)
+
+
+def encode_cursor(sort_key, case):
+    return f"{case.id}:{sort_key.value(case)}"
+
+
+def decode_cursor(cursor):
+    """(id, valor de la clave) a partir de "id:valor", o None si no es válido."""
+    case_id, sep, value = (cursor or "").partition(":")
+    if not sep:
+        return None
+    try:
+        return int(case_id), value
+    except ValueError:
+        return None
+
+
+def keyset_paginate(query, sort, per_page, after=None, before=None, total=None):
+    """
+    Página de `query` en el orden `sort` que sigue a `after` (o precede a
+    `before`), sin OFFSET ni COUNT(*): cada página es un seek por índice y
+    cuesta lo mismo sea la primera o la número mil.
+
+    after/before son cursores "id:valor" tomados de la página anterior; uno
+    inválido se ignora y se muestra la primera página. total se pasa tal cual
+    (lo calcula quien llama, p. ej. el índice de filtros).
+    """
+    sort_key = SORT_KEYS.get(sort, SORT_KEYS["fecha_desc"])
+    column = sort_key.column
+
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+
+    # Hacia atrás se recorre en el orden inverso y luego se da vuelta la página
+    backwards = before is not None
+    descending = sort_key.descending != backwards
+    if descending:
+        order = (column.desc(), Case.id.desc())
+    else:
+        order = (column.asc(), Case.id.asc())
+
+    seek = after or before
+    if seek is not None:
+        case_id, value = seek
+        row = tuple_(column, Case.id)
+        bound = tuple_(literal(value, db.String), literal(case_id))
+        # La condición sobre la columna sola es redundante, pero sin ella SQLite
+        # no busca por rango en el índice de expresión (ix_case_fecha_sort)
+        edge = literal(value, db.String)
+        if descending:
+            query = query.filter(column <= edge, row < bound)
+        else:
+            query = query.filter(column >= edge, row > bound)
+
+    # Un elemento de más para saber si hay otra página en esa dirección
+    items = query.order_by(*order).limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    return KeysetPage(
+        items=items,
+        total=total,
+        has_prev=has_more if backwards else seek is not None,
+        has_next=seek is not None if backwards else has_more,
+        prev_cursor=encode_cursor(sort_key, items[0]) if items else None,
+        next_cursor=encode_cursor(sort_key, items[-1]) if items else None,
+    )
+
+
+# Orden por el puntaje de match_query_scores; no es una columna, así que no
+# está en SORT_KEYS y lo pagina relevance_paginate
+RELEVANCE_SORT = "relevancia"
+
+
+def relevance_paginate(query, scores, case_ids, per_page, after=None, before=None, total=None):
+    """
+    Página de `case_ids` de mayor a menor scores[id] (empates por id), con
+    cursores "id:puntaje" como los de keyset_paginate.
+
+    Una sola pasada sobre los candidatos con un heap de per_page + 1
+    elementos: no se ordena el conjunto completo, y de `query` solo se traen
+    las filas de la página.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+    seek = after or before
+    bound = None
+    if seek is not None:
+        try:
+            bound = (-float(seek[1]), seek[0])
+        except ValueError:  # cursor de otro orden (p. ej. una fecha)
+            after = before = seek = None
+
+    # Clave ascendente = mejor primero
+    keys = ((-scores[case_id], case_id) for case_id in case_ids)
+    if before is not None:
+        top = heapq.nlargest(per_page + 1, (key for key in keys if key < bound))
+    else:
+        if after is not None:
+            keys = (key for key in keys if key > bound)
+        top = heapq.nsmallest(per_page + 1, keys)
+    has_more = len(top) > per_page
+    top = top[:per_page]
+    if before is not None:
+        top.reverse()
+
+    ids = [case_id for _, case_id in top]
+    rows = {row.id: row for row in query.filter(Case.id.in_(ids))} if ids else {}
+    items = [rows[case_id] for case_id in ids if case_id in rows]
+
+    def cursor(key):
+        return f"{key[1]}:{-key[0]!r}"
+
+    backwards = before is not None
+    return KeysetPage(
+        items=items,
+        total=total,
+        has_prev=has_more if backwards else seek is not None,
+        has_next=seek is not None if backwards else has_more,
+        prev_cursor=cursor(top[0]) if top else None,
+        next_cursor=cursor(top[-1]) if top else None,
+    )
+
+
+def page_url(**cursor):
+    """URL de la búsqueda actual (mismos filtros) con otro cursor after/before."""
+    args = request.args.to_dict(flat=False)
+    for key in ("after", "before", "page"):
+        args.pop(key, None)
+    args.update(cursor)
+    return url_for("search", **args)
+
+
+# --- Instrumentación (tiempos por etapa y /metrics) --------
+
+# Endpoints que se miden cuando SEARCH_TIMING está activo
+TIMED_ENDPOINTS = ("search", "api_search")
+
+# Límites (segundos) del histograma de duración por request
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTiming:
+    """Tiempos de un request: por etapa, de SQL (cantidad y duración) y total."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # nombre -> segundos, en orden de aparición
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        parts.append(f'sql;desc="{self.sql_count} queries";dur={self.sql_seconds * 1000:.2f}')
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def current_timing():
+    """RequestTiming del request en curso, o None si no se está midiendo."""
+    if not has_request_context():
+        return None
+    return g.get("request_timing")
+
+
+@contextmanager
+def timed_stage(name):
+    """Sumar la duración del bloque a la etapa `name` del request (si se mide)."""
+    timing = current_timing()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.stages[name] = timing.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_timer_start(conn, cursor, statement, parameters, context, executemany):
+    if current_timing() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_timer_stop(conn, cursor, statement, parameters, context, executemany):
+    timing = current_timing()
+    starts = conn.info.get("query_start_time")
+    if timing is not None and starts:
+        timing.sql_count += 1
+        timing.sql_seconds += time.perf_counter() - starts.pop()
+
+
+class SearchMetrics:
+    """
+    Acumulados del proceso para /metrics (formato de texto de Prometheus):
+    requests y su histograma de duración, segundos por etapa, sentencias
+    SQL y búsquedas lentas, por endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._slow = Counter()
+        self._duration_sum = Counter()
+        self._buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._stage_sum = Counter()  # (endpoint, stage) -> segundos
+        self._stage_count = Counter()
+        self._sql_count = Counter()
+        self._sql_sum = Counter()
+
+    def observe(self, endpoint, timing, total, slow):
+        with self._lock:
+            self._requests[endpoint] += 1
+            self._slow[endpoint] += int(slow)
+            self._duration_sum[endpoint] += total
+            buckets = self._buckets[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            for stage, seconds in timing.stages.items():
+                self._stage_sum[endpoint, stage] += seconds
+                self._stage_count[endpoint, stage] += 1
+            self._sql_count[endpoint] += timing.sql_count
+            self._sql_sum[endpoint] += timing.sql_seconds
+
+    def render(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        with self._lock:
+            endpoints = sorted(self._requests)
+            histogram = []
+            for endpoint in endpoints:
+                for bound, n in zip(DURATION_BUCKETS, self._buckets[endpoint]):
+                    histogram.append(((("endpoint", endpoint), ("le", bound)), n))
+                histogram.append(
+                    ((("endpoint", endpoint), ("le", "+Inf")), self._requests[endpoint])
+                )
+            lines.append("# HELP search_request_duration_seconds Duración de los requests de búsqueda.")
+            lines.append("# TYPE search_request_duration_seconds histogram")
+            for labels, value in histogram:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"search_request_duration_seconds_bucket{{{label_text}}} {value}")
+            for endpoint in endpoints:
+                lines.append(
+                    f'search_request_duration_seconds_sum{{endpoint="{endpoint}"}} '
+                    f"{self._duration_sum[endpoint]}"
+                )
+                lines.append(
+                    f'search_request_duration_seconds_count{{endpoint="{endpoint}"}} '
+                    f"{self._requests[endpoint]}"
+                )
+
+            metric(
+                "search_stage_seconds_total", "counter", "Segundos acumulados por etapa.",
+                [((("endpoint", e), ("stage", s)), v) for (e, s), v in sorted(self._stage_sum.items())],
+            )
+            metric(
+                "search_stage_calls_total", "counter", "Requests que pasaron por cada etapa.",
+                [((("endpoint", e), ("stage", s)), v) for (e, s), v in sorted(self._stage_count.items())],
+            )
+            metric(
+                "search_sql_statements_total", "counter", "Sentencias SQL ejecutadas.",
+                [((("endpoint", e),), self._sql_count[e]) for e in endpoints],
+            )
+            metric(
+                "search_sql_seconds_total", "counter", "Segundos en sentencias SQL.",
+                [((("endpoint", e),), self._sql_sum[e]) for e in endpoints],
+            )
+            metric(
+                "search_slow_requests_total", "counter",
+                "Requests más lentos que SLOW_SEARCH_MS.",
+                [((("endpoint", e),), self._slow[e]) for e in endpoints],
+            )
+        return "\n".join(lines) + "\n"
+
+
+search_metrics = SearchMetrics()
+
+
+@app.before_request
+def _start_request_timing():
+    if app.config["SEARCH_TIMING"] and request.endpoint in TIMED_ENDPOINTS:
+        g.request_timing = RequestTiming()
+
+
+@app.after_request
+def _finish_request_timing(response):
+    timing = current_timing()
+    if timing is None:
+        return response
+
+    total = timing.elapsed()
+    slow = total * 1000 >= app.config["SLOW_SEARCH_MS"]
+    response.headers["Server-Timing"] = timing.server_timing(total)
+    search_metrics.observe(request.endpoint, timing, total, slow)
+    if slow:
+        params = parse_search_args(request.args, per_page=None)
+        app.logger.warning(
+            "Búsqueda lenta (%.1f ms, %d SQL) en %s: params=%s sort=%s cursor=%s etapas=%s",
+            total * 1000,
+            timing.sql_count,
+            request.endpoint,
+            json.dumps(search_cache_key(params), default=str, ensure_ascii=False),
+            params.sort,
+            params.after or params.before,
+            {name: round(s * 1000, 1) for name, s in timing.stages.items()},
         )
-        db.session.add(case)
+    return response
 
-    db.session.commit()
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Métricas de búsqueda del proceso en formato Prometheus (ver SEARCH_TIMING)."""
+    return app.response_class(
+        search_metrics.render(), mimetype="text/plain; version=0.0.4"
+    )
 
-# --- Ruta de búsqueda (tags + keyword + árbitro + fechas) ---
 
-@app.route("/", methods=["GET"])
-def search():
-    q = (request.args.get("q") or "").strip()
-    selected_tags_raw = request.args.getlist("tag")  # checkboxes: name="tag"
-    sort = request.args.get("sort", "fecha_desc")
-    page = request.args.get("page", 1, type=int)
-    per_page = 5
+# --- Motor de búsqueda (compartido por / y /api/search) -----
+
+SearchParams = namedtuple(
+    "SearchParams",
+    ["q", "tag_ids", "arbiter_ids", "industries", "date_from", "date_to",
+     "sort", "after", "before", "per_page"],
+)
+SearchResult = namedtuple("SearchResult", ["results", "pagination", "facet_counts"])
+
 
-    # Nuevos filtros
-    # Nuevos filtros
-    # keyword_filter = (request.args.get("keyword") or "").strip() # Removed
-    arbiter_filters = request.args.getlist("arbiter") 
-    industry_filters = request.args.getlist("industry")
-    date_from_str = (request.args.get("date_from") or "").strip()
-    date_to_str = (request.args.get("date_to") or "").strip()
-
-    # Parsear IDs de tags seleccionados
-    selected_tag_ids = []
-    for t in selected_tags_raw:
+def _parse_int_list(values):
+    ids = []
+    for value in values:
         try:
-            selected_tag_ids.append(int(t))
+            ids.append(int(value))
         except ValueError:
             pass
+    return ids
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime((value or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def parse_search_args(args, per_page):
+    """
+    SearchParams a partir de los parámetros GET de la búsqueda. Los valores
+    inválidos (ids no numéricos, fechas mal escritas) se ignoran.
+    """
+    return SearchParams(
+        q=(args.get("q") or "").strip(),
+        tag_ids=_parse_int_list(args.getlist("tag")),  # checkboxes: name="tag"
+        # arbiter trae IDs (e.g. ['3', '5'])
+        arbiter_ids=_parse_int_list(args.getlist("arbiter")),
+        industries=args.getlist("industry"),
+        date_from=_parse_date(args.get("date_from")),
+        date_to=_parse_date(args.get("date_to")),
+        # Con q se ordena por relevancia salvo que se pida otro orden
+        sort=args.get("sort") or (RELEVANCE_SORT if (args.get("q") or "").strip() else "fecha_desc"),
+        # Cursores de la paginación por keyset (ver keyset_paginate)
+        after=args.get("after"),
+        before=args.get("before"),
+        per_page=per_page,
+    )
+
+
+def match_query_scores(q):
+    """
+    Casos que coinciden con q: búsqueda exacta (FTS5 o LIKE), búsqueda fuzzy
+    por trigramas y, si SEMANTIC_SEARCH está activo, búsqueda semántica. Sin
+    mayúsculas ni tildes. Devuelve {case_id: relevancia}, el puntaje de
+    reciprocal rank fusion de las tres listas: la exacta viene ordenada por
+    BM25 con pesos por campo (FTS_BM25_WEIGHTS: radicado > título > tags >
+    contenido) y la fuzzy por WRatio.
+    """
+    q_norm = normalize_text(q)
+    search_pattern = f"%{q_norm}%"
 
-    all_tags = Tag.query.order_by(Tag.name.asc()).all()
-
-    query = Case.query
-
-    # ---------- BÚSQUEDA GENERAL (q) - CASE INSENSITIVE ----------
-    # ---------- BÚSQUEDA HÍBRIDA (EXACTA + FUZZY) ----------
-    if q:
-        q_norm = q.lower()
-        search_pattern = f"%{q_norm}%"
-        
-        # 1. Búsqueda Exacta (SQL LIKE) - Base
-        # Buscamos coincidencias directas en DB
-        exact_query = Case.query.outerjoin(Case.tags).filter(
-                or_(
-                    func.lower(Case.title).like(search_pattern),
-                    func.lower(Case.content).like(search_pattern),
-                    func.lower(Case.radicado).like(search_pattern),
-                    func.lower(Case.arbiter).like(search_pattern),
-                    func.lower(Case.keywords).like(search_pattern),
-                    func.lower(Case.industry).like(search_pattern),
-                    func.lower(Tag.name).like(search_pattern),
+    # 1. Búsqueda Exacta - índice FTS5 con ranking BM25
+    # exact_ids queda ordenado por relevancia (mejor primero)
+    with timed_stage("exact"):
+        if fts_available():
+            exact_ids = fts_search(q)
+            # Más los casos cuyo PDF completo (case_page) coincide
+            seen = set(exact_ids)
+            exact_ids += [i for i in fts_search_pages(q) if i not in seen]
+        else:
+            # Fallback sin FTS5: SQL LIKE sobre las columnas normalizadas
+            exact_query = Case.query.outerjoin(Case.tags).filter(
+                    or_(
+                        Case.title_norm.like(search_pattern),
+                        Case.content_norm.like(search_pattern),
+                        Case.radicado_norm.like(search_pattern),
+                        Case.arbiter_norm.like(search_pattern),
+                        Case.keywords_norm.like(search_pattern),
+                        Case.industry_norm.like(search_pattern),
+                        Tag.name_norm.like(search_pattern),
+                    )
                 )
+            exact_ids = list({c.id for c in exact_query.with_entities(Case.id).all()})
+
+    # 2. Búsqueda Fuzzy (TheFuzz)
+    # En vez de traer todas las filas, el índice de trigramas en memoria
+    # preselecciona los candidatos más parecidos (Title + Keywords + Industry)
+    with timed_stage("fuzzy_candidates"):
+        candidate_ids, candidate_texts = fuzzy_index.candidates(
+            q, app.config["FUZZY_CANDIDATE_LIMIT"]
+        )
+
+    # El motor configurado (rapidfuzz en lote por defecto) devuelve
+    # [(case_id, score)] ya filtrado por FUZZY_MIN_SCORE. Usamos WRatio,
+    # que es más robusto para typos y parciales
+    with timed_stage("fuzzy_score"):
+        fuzzy_scores = dict(
+            get_fuzzy_scorer().score(
+                q,
+                candidate_ids,
+                candidate_texts,
+                limit=app.config["FUZZY_LIMIT"],
+                min_score=app.config["FUZZY_MIN_SCORE"],
             )
-        exact_ids = {c.id for c in exact_query.with_entities(Case.id).all()} # Set for unique IDs
-
-        # 2. Búsqueda Fuzzy (TheFuzz)
-        # Obtenemos candidatos para comparar (Title + Keywords + Industry)
-        # Traemos todos los IDs y texto relevante. Optimizamos trayendo solo columnas necesarias.
-        # Nota: Si la DB es muy grande, esto debería limitarse o cachearse. Para demo está bien.
-        all_candidates = Case.query.with_entities(Case.id, Case.title, Case.keywords, Case.industry).all()
-        
-        choices = {}
-        for c in all_candidates:
-            # Construimos un string representativo
-            # Peso mayor al título y keywords
-            text_repr = f"{c.title} {c.keywords or ''} {c.industry or ''}"
-            choices[c.id] = text_repr
-            
-        # process.extract devuelve lista de (string_match, score, key)
-        # Usamos WRatio que es más robusto para typos y parciales
-        fuzzy_results = process.extract(q, choices, limit=20, scorer=fuzz.WRatio)
-        
-        # Filtramos por score > 50 (ajustable)
-        fuzzy_ids = {res[2] for res in fuzzy_results if res[1] >= 50}
-        
-        # 3. Combinar Resultados
-        combined_ids = exact_ids.union(fuzzy_ids)
-        
-        # Si no hay matches, forzamos resultado vacío (o dejamos vacío si combined_ids es empty)
-        if not combined_ids:
-            # Truco para devolver query vacía
-            query = query.filter(Case.id == -1)
-        else:
-            query = query.filter(Case.id.in_(combined_ids))
+        )
+
+    # 3. Búsqueda semántica (opcional): casos cercanos en significado aunque
+    # no compartan palabras con q
+    semantic_ids = []
+    if app.config["SEMANTIC_SEARCH"]:
+        with timed_stage("semantic"):
+            semantic_ids = [
+                case_id for case_id, _ in semantic_index.search(q, app.config["SEMANTIC_LIMIT"])
+            ]
 
+    # 4. Combinar Resultados
+    fuzzy_ids = sorted(fuzzy_scores, key=lambda case_id: (-fuzzy_scores[case_id], case_id))
+    return reciprocal_rank_fusion(
+        (exact_ids, fuzzy_ids, semantic_ids), app.config["RRF_K"]
+    )
 
-    # Filtro por tags (facetas)
-    if selected_tag_ids:
-        query = query.filter(Case.tags.any(Tag.id.in_(selected_tag_ids)))
 
-    # ---------- FILTRO POR ÁRBITRO / TRIBUNAL (Multi-select) ----------
-    # ---------- FILTRO POR ÁRBITRO / TRIBUNAL (Multi-select) ----------
-    if arbiter_filters:
-        # arbiter_filters tiene IDs (e.g. ['3', '5'])
-        arb_ids = []
-        for x in arbiter_filters:
-            try:
-                arb_ids.append(int(x))
-            except:
-                pass
-        
-        if arb_ids:
-            query = query.filter(Case.arbiters.any(Arbiter.id.in_(arb_ids)))
-
-    # ---------- FILTRO POR INDUSTRIA (Multi-select) ----------
-    if industry_filters:
-        query = query.filter(Case.industry.in_(industry_filters))
-
-    # ---------- FILTRO POR RANGO DE FECHAS ----------
-    date_from = None
-    date_to = None
-    if date_from_str:
-        try:
-            date_from = datetime.strptime(date_from_str, "%Y-%m-%d").date()
-        except ValueError:
-            date_from = None
-    if date_to_str:
-        try:
-            date_to = datetime.strptime(date_to_str, "%Y-%m-%d").date()
-        except ValueError:
-            date_to = None
-
-    if date_from:
-        query = query.filter(Case.fecha_laudo >= date_from)
-    if date_to:
-        query = query.filter(Case.fecha_laudo <= date_to)
-
-    # Orden
-    if sort == "fecha_asc":
-        order_clause = Case.fecha_laudo.asc()
-    elif sort == "radicado_asc":
-        order_clause = Case.radicado.asc()
-    else:  # default: fecha_desc
-        order_clause = Case.fecha_laudo.desc()
-
-    # Paginación
-    pagination = db.paginate(
-        query.order_by(order_clause),
-        page=page,
-        per_page=per_page,
-        error_out=False,
+class GenerationLRUCache:
+    """
+    Caché LRU con TTL para valores derivados de la base. Tamaño y TTL se leen
+    de app.config (size_setting / ttl_setting; tamaño 0 la desactiva) y se
+    vacía cuando cambia la generación de datos.
+
+    Con weight_setting y weigh(valor), además de las entradas se acota la
+    suma de sus pesos: se desalojan las más viejas hasta entrar, y un valor
+    que por sí solo pasa el límite no se guarda.
+    """
+
+    def __init__(self, size_setting, ttl_setting, weight_setting=None, weigh=None):
+        self.size_setting = size_setting
+        self.ttl_setting = ttl_setting
+        self.weight_setting = weight_setting
+        self.weigh = weigh
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (expira, valor, peso)
+        self._weight = 0
+        self._generation = None
+
+    def get_or_compute(self, key, compute):
+        max_size = app.config[self.size_setting]
+        if not max_size:
+            return compute()
+
+        generation = data_generation()
+        now = time.monotonic()
+        with self._lock:
+            if self._generation != generation:
+                self._entries.clear()
+                self._weight = 0
+                self._generation = generation
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = compute()
+        weight = self.weigh(value) if self.weigh else 0
+        max_weight = app.config[self.weight_setting] if self.weight_setting else None
+        if max_weight is not None and weight > max_weight:
+            return value
+
+        with self._lock:
+            # Si hubo una escritura mientras calculábamos, no guardamos
+            if self._generation == generation:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._weight -= old[2]
+                self._entries[key] = (now + app.config[self.ttl_setting], value, weight)
+                self._weight += weight
+                while len(self._entries) > max_size or (
+                    max_weight is not None and self._weight > max_weight
+                ):
+                    _, evicted = self._entries.popitem(last=False)
+                    self._weight -= evicted[2]
+        return value
+
+
+# FilterResult (ids, total y conteos) de cada combinación de q y filtros, para
+# no repetir FTS, fuzzy y bitmaps en búsquedas idénticas. El orden y el cursor
+# no forman parte de la clave: la página se sigue pidiendo a SQL sobre los ids.
+search_cache = GenerationLRUCache(
+    "SEARCH_CACHE_SIZE",
+    "SEARCH_CACHE_TTL",
+    "SEARCH_CACHE_MAX_IDS",
+    lambda result: len(result.case_ids or ()) + len(result.scores or ()),
+)
+
+
+def search_cache_key(params):
+    """Clave canónica: q normalizado y filtros sin repetir y ordenados."""
+    return (
+        normalize_text(params.q),
+        tuple(sorted(set(params.tag_ids))),
+        tuple(sorted(set(params.arbiter_ids))),
+        tuple(sorted(set(params.industries))),
+        params.date_from,
+        params.date_to,
     )
-    results = pagination.items
 
-    industries_q = [i[0] for i in db.session.query(Case.industry).distinct().all() if i[0]]
-    industries = sorted(industries_q)
-    
-    # Arbiters with IDs
-    arbiters = Arbiter.query.order_by(Arbiter.name).all()
-
-    return render_template(
-        "search.html",
-        tags=all_tags,
-        industries=industries, 
-        arbiters=arbiters,
-        results=results,
-        q=q,
-        selected_tag_ids=selected_tag_ids,
-        selected_industries=industry_filters,
-        selected_arbiters=arbiter_filters,
-        sort=sort,
-        pagination=pagination,
-        per_page=per_page,
-        # keyword_filter=keyword_filter, # Removed
-        arbiter_filter="", # Deprecated single value
-        date_from=date_from_str,
-        date_to=date_to_str,
-        industry_filter="", # Deprecated single value
+
+def _filter_search(params):
+    # Casos que devuelve q con su relevancia (None = sin búsqueda de texto);
+    # el resto de filtros se resuelve contra el índice de bitmaps en memoria
+    scores = match_query_scores(params.q) if params.q else None
+
+    # Tags, árbitros, industrias (OR dentro de cada faceta, AND entre ellas) y
+    # rango de fechas se cruzan como bitmaps; SQL solo trae la página final
+    with timed_stage("filter"):
+        filtered = filter_index.search(
+            candidate_ids=scores,
+            date_from=params.date_from,
+            date_to=params.date_to,
+            tag_ids=params.tag_ids,
+            arbiter_ids=params.arbiter_ids,
+            industries=params.industries,
+        )
+    return filtered._replace(scores=scores)
+
+
+def run_search(params):
+    """Ejecutar una búsqueda: página de CaseResult, paginación y conteos de facetas."""
+    filtered = search_cache.get_or_compute(
+        search_cache_key(params), lambda: _filter_search(params)
     )
 
+    query = Case.query.with_entities(*RESULT_COLUMNS)
+
+    # Por relevancia, la página sale de los puntajes en memoria y SQL solo
+    # trae esas filas; sin q no hay puntajes y se ordena por fecha
+    if params.sort == RELEVANCE_SORT and filtered.scores is not None:
+        with timed_stage("paginate"):
+            pagination = relevance_paginate(
+                query,
+                filtered.scores,
+                filtered.case_ids,
+                params.per_page,
+                after=params.after,
+                before=params.before,
+                total=filtered.total,
+            )
+        with timed_stage("results"):
+            results = load_results(pagination.items, q=params.q)
+        return SearchResult(results, pagination, filtered.counts)
+
+    if filtered.case_ids is not None:
+        if filtered.case_ids:
+            query = query.filter(Case.id.in_(filtered.case_ids))
+        else:
+            # Truco para devolver query vacía
+            query = query.filter(Case.id == -1)
+
+    # Orden + paginación por cursor; el total sale del índice de filtros
+    with timed_stage("paginate"):
+        pagination = keyset_paginate(
+            query,
+            params.sort,
+            params.per_page,
+            after=params.after,
+            before=params.before,
+            total=filtered.total,
+        )
+    with timed_stage("results"):
+        results = load_results(pagination.items, q=params.q)
+    return SearchResult(results, pagination, filtered.counts)
+
+
+# --- Ruta de búsqueda (tags + keyword + árbitro + fechas) ---
+
+# HTML ya renderizado de la página de búsqueda por combinación de parámetros:
+# la portada y las búsquedas populares no vuelven a pasar por Jinja
+page_cache = GenerationLRUCache("PAGE_CACHE_SIZE", "PAGE_CACHE_TTL")
+
+# Distingue los ETag de este proceso: la generación de datos es un contador
+# local que vuelve a 0 al reiniciar
+_BOOT_ID = os.urandom(4).hex()
+
+
+def search_page_etag(args):
+    """
+    ETag de la página de búsqueda: generación de datos + parámetros GET en
+    forma canónica (claves y valores ordenados). Se calcula sin consultar la
+    base: la generación ya refleja las escrituras de otros procesos, porque
+    sync_data_version corre antes de cada request.
+    """
+    canonical = sorted((key, sorted(values)) for key, values in args.lists())
+    digest = hashlib.sha1(
+        json.dumps(canonical, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{_BOOT_ID}-{data_generation()}-{digest}"
+
+
+@app.route("/", methods=["GET"])
+def search():
+    # Revalidación (If-None-Match): si nada cambió, 304 sin buscar ni renderizar
+    etag = search_page_etag(request.args)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        html = page_cache.get_or_compute(etag, render_search_page)
+        response = app.response_class(html, mimetype="text/html")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config["PAGE_CACHE_MAX_AGE"]
+    if not app.config["PAGE_CACHE_MAX_AGE"]:
+        response.cache_control.no_cache = True
+    return response
+
+
+def render_search_page():
+    per_page = 5
+    params = parse_search_args(request.args, per_page)
+    found = run_search(params)
+
+    # Facetas (tags, árbitros con IDs, industrias) desde la caché en memoria
+    with timed_stage("facets"):
+        facets = facet_cache.get()
+
+    with timed_stage("render"):
+        return render_template(
+            "search.html",
+            tags=facets.tags,
+            industries=facets.industries,
+            arbiters=facets.arbiters,
+            facet_counts=found.facet_counts,
+            results=found.results,
+            q=params.q,
+            selected_tag_ids=params.tag_ids,
+            selected_industries=params.industries,
+            selected_arbiters=request.args.getlist("arbiter"),
+            sort=params.sort,
+            pagination=found.pagination,
+            page_url=page_url,
+            per_page=per_page,
+            # keyword_filter=keyword_filter, # Removed
+            arbiter_filter="", # Deprecated single value
+            date_from=(request.args.get("date_from") or "").strip(),
+            date_to=(request.args.get("date_to") or "").strip(),
+            industry_filter="", # Deprecated single value
+        )
+
+
+# --- API de búsqueda JSON ----------------------------------
+
+# Campos que se pueden pedir con ?fields=; sin fields, los de API_DEFAULT_FIELDS
+API_RESULT_FIELDS = (
+    "id", "radicado", "fecha_laudo", "title", "arbiter", "snippet", "tags",
+    "highlight", "page", "page_highlight", "download_url",
+)
+API_DEFAULT_FIELDS = ("id", "radicado", "fecha_laudo", "title", "snippet", "tags")
+
+
+def _api_result_field(result, field):
+    if field == "fecha_laudo":
+        return result.fecha_laudo.isoformat() if result.fecha_laudo else None
+    if field == "snippet":
+        return result.snippet + ("..." if result.truncated else "")
+    if field in ("highlight", "page_highlight"):
+        value = getattr(result, field)
+        return str(value) if value is not None else None
+    if field == "download_url":
+        if not result.doc_filename:
+            return None
+        return url_for("download_case", case_id=result.id)
+    return getattr(result, field)
+
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """
+    Misma búsqueda que /, en JSON y sin renderizar plantilla.
+
+    Acepta los parámetros de / (q, tag, arbiter, industry, date_from,
+    date_to, sort, after, before; con q, sort es "relevancia" por defecto)
+    y además:
+      limit   resultados por página (1-50, por defecto 10)
+      fields  campos de cada resultado, separados por coma (API_RESULT_FIELDS)
+      facets  "0" para omitir los conteos de facetas
+
+    {"total": 12, "results": [...], "next_cursor": "...", "prev_cursor": null,
+     "facets": {"tag": {"3": 5}, "arbiter": {...}, "industry": {...}}}
+
+    highlight y page_highlight son HTML con los términos en <mark>.
+    """
+    limit = max(1, min(request.args.get("limit", 10, type=int) or 10, 50))
+
+    fields_arg = (request.args.get("fields") or "").strip()
+    if fields_arg:
+        fields = [f.strip() for f in fields_arg.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in API_RESULT_FIELDS]
+        if unknown:
+            return (
+                jsonify(
+                    {
+                        "error": f"campos desconocidos: {', '.join(unknown)}",
+                        "fields": list(API_RESULT_FIELDS),
+                    }
+                ),
+                400,
+            )
+    else:
+        fields = API_DEFAULT_FIELDS
+
+    found = run_search(parse_search_args(request.args, limit))
+    pagination = found.pagination
+
+    payload = {
+        "total": pagination.total,
+        "results": [
+            {field: _api_result_field(result, field) for field in fields}
+            for result in found.results
+        ],
+        "next_cursor": pagination.next_cursor if pagination.has_next else None,
+        "prev_cursor": pagination.prev_cursor if pagination.has_prev else None,
+    }
+    if request.args.get("facets") != "0":
+        payload["facets"] = found.facet_counts
+    return jsonify(payload)
+
+
+# --- Autocompletado ----------------------------------------
+
+def suggest_url(entry):
+    """URL de la búsqueda a la que lleva una sugerencia."""
+    if entry.kind == "tag":
+        return url_for("search", tag=entry.ref)
+    if entry.kind == "arbiter":
+        return url_for("search", arbiter=entry.ref)
+    if entry.kind == "industry":
+        return url_for("search", industry=entry.ref)
+    return url_for("search", q=entry.label)
+
+
+@app.route("/api/suggest", methods=["GET"])
+def api_suggest():
+    """
+    Sugerencias para la caja de búsqueda mientras se escribe: radicados,
+    títulos, tags, árbitros e industrias que empiezan por ?prefix=, desde
+    SuggestIndex en memoria (sin consultas a SQLite). ?limit= hasta 20.
+
+    {"prefix": "plo", "suggestions": [{"type": "title", "label": "...",
+     "id": 2, "url": "/?q=..."}]}
+    """
+    prefix = (request.args.get("prefix") or "").strip()
+    limit = request.args.get("limit", app.config["SUGGEST_LIMIT"], type=int)
+    limit = max(1, min(limit or app.config["SUGGEST_LIMIT"], 20))
+
+    suggestions = []
+    for entry in suggest_index.suggest(prefix, limit):
+        item = {"type": entry.kind, "label": entry.label, "url": suggest_url(entry)}
+        if entry.kind != "industry":
+            item["id"] = entry.ref
+        suggestions.append(item)
+    return jsonify({"prefix": prefix, "suggestions": suggestions})
+
 
 # --- Ruta de descarga ---------------------------------------
 
 @app.route("/cases/<int:case_id>/download")
 def download_case(case_id):
-    case = Case.query.get_or_404(case_id)
+    """
+    Descargar el laudo del caso.
 
-    if not case.doc_filename:
+    Responde peticiones Range (206) para descargas reanudables y visores PDF
+    que cargan por páginas, y peticiones condicionales (304) con ETag fuerte
+    (mtime + tamaño + ruta) y Last-Modified. Con ?inline=1 el PDF se abre en
+    el navegador en vez de descargarse.
+    """
+    doc_filename = document_cache.get(case_id)
+    if not doc_filename:
         abort(404)
 
-    docs_dir = app.config["CASE_DOCS_DIR"]
-    filepath = os.path.join(docs_dir, case.doc_filename)
-    if not os.path.isfile(filepath):
-        abort(404)
+    if app.config["CASE_DOCS_ACCEL_PREFIX"]:
+        return accel_redirect(doc_filename)
 
+    # send_from_directory responde 404 si el archivo no existe y hace el único
+    # stat necesario para el ETag y el tamaño
     return send_from_directory(
-        docs_dir,
-        case.doc_filename,
-        as_attachment=True,
+        app.config["CASE_DOCS_DIR"],
+        doc_filename,
+        as_attachment=not request.args.get("inline"),
+        conditional=True,
+        etag=True,
+        max_age=app.config["CASE_DOCS_MAX_AGE"],
+    )
+
+
+def accel_redirect(doc_filename):
+    """
+    Respuesta vacía con X-Accel-Redirect a CASE_DOCS_ACCEL_PREFIX: nginx
+    envía el archivo (y resuelve Range y las peticiones condicionales).
+    """
+    path = safe_join(app.config["CASE_DOCS_DIR"], doc_filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    response = app.response_class(
+        mimetype=mimetypes.guess_type(doc_filename)[0] or "application/octet-stream"
+    )
+    prefix = app.config["CASE_DOCS_ACCEL_PREFIX"].rstrip("/")
+    response.headers["X-Accel-Redirect"] = f"{prefix}/{quote(doc_filename)}"
+    if not request.args.get("inline"):
+        response.headers.set("Content-Disposition", "attachment", filename=doc_filename)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config["CASE_DOCS_MAX_AGE"]
+    return response
+
+
+# --- Carga de casos (validación e ingesta en lote) ---------
+
+def _payload_text(data, *keys):
+    """
+    Primer valor no vacío de keys en data, sin espacios alrededor ("" si no
+    hay). Un valor que no es texto (p. ej. "radicado": 123) es un ValueError,
+    como cualquier otro campo inválido.
+    """
+    for key in keys:
+        value = data.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"{key} debe ser texto")
+        value = value.strip()
+        if value:
+            return value
+    return ""
+
+
+def parse_case_payload(data):
+    """
+    Validar el JSON de un caso (ver create_case) y devolver (campos, tags):
+    los valores de columna de Case y la lista de nombres de tag sin repetir.
+    Lanza ValueError con el mensaje para el cliente si algo no es válido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("cada caso debe ser un objeto JSON")
+
+    radicado = _payload_text(data, "radicado")
+    title = _payload_text(data, "title")
+    content = _payload_text(data, "content")
+    doc_filename = _payload_text(data, "doc_filename", "path")
+    arbiter = _payload_text(data, "arbiter")
+    keywords = _payload_text(data, "keywords")
+    industry = _payload_text(data, "industry")
+    tags_in = data.get("tags") or []
+    fecha_laudo_str = _payload_text(data, "fecha_laudo")
+
+    if not radicado or not title or not content or not doc_filename:
+        raise ValueError("radicado, title, content y path/doc_filename son obligatorios")
+
+    # Parsear fecha del laudo si viene
+    fecha_laudo = None
+    if fecha_laudo_str:
+        try:
+            fecha_laudo = datetime.strptime(fecha_laudo_str, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError("fecha_laudo debe tener formato YYYY-MM-DD")
+
+    if not isinstance(tags_in, list):
+        raise ValueError("tags debe ser una lista de nombres de etiqueta")
+
+    tag_names = []
+    for raw_name in tags_in:
+        if not isinstance(raw_name, str):
+            continue
+        name = raw_name.strip()
+        if name and name not in tag_names:
+            tag_names.append(name)
+
+    fields = {
+        "radicado": radicado,
+        "fecha_laudo": fecha_laudo,
+        "title": title,
+        "content": content,
+        "doc_filename": doc_filename,
+        "arbiter": arbiter,
+        "keywords": keywords,
+        "industry": industry or None,
+    }
+    return fields, tag_names
+
+
+def _upsert_names(model, names, extra=None):
+    """
+    {nombre: id} para todos los names de model (Tag o Arbiter): una consulta
+    para los existentes y un INSERT múltiple (ON CONFLICT DO NOTHING) para los
+    nuevos. extra(nombre) agrega columnas calculadas, como name_norm.
+    """
+    names = set(names)
+    if not names:
+        return {}
+
+    rows = [{"name": name, **(extra(name) if extra else {})} for name in names]
+    db.session.execute(sqlite_insert(model).on_conflict_do_nothing(), rows)
+    return dict(
+        db.session.execute(select(model.name, model.id).where(model.name.in_(names))).all()
+    )
+
+
+def ingest_case_chunk(items):
+    """
+    Escribir un bloque de casos ya validados [(campos, tags, arbiters)] en
+    una sola transacción: tags y árbitros en lote, casos y asociaciones con
+    executemany. Devuelve los ids nuevos en el mismo orden que items.
+    """
+    tag_ids = _upsert_names(
+        Tag,
+        (name for _, tags, _ in items for name in tags),
+        extra=lambda name: {"name_norm": normalize_text(name)},
     )
+    arbiter_ids = _upsert_names(Arbiter, (name for _, _, arbs in items for name in arbs))
+
+    # Los INSERT en lote no pasan por before_insert: normalizamos aquí
+    case_rows = []
+    for fields, _, _ in items:
+        row = dict(fields)
+        for field in Case.NORMALIZED_FIELDS:
+            row[f"{field}_norm"] = normalize_text(fields[field])
+        case_rows.append(row)
+
+    case_ids = list(
+        db.session.scalars(
+            insert(Case).returning(Case.id, sort_by_parameter_order=True), case_rows
+        )
+    )
+
+    tag_links = [
+        {"case_id": case_id, "tag_id": tag_ids[name]}
+        for case_id, (_, tags, _) in zip(case_ids, items)
+        for name in tags
+    ]
+    arbiter_links = [
+        {"case_id": case_id, "arbiter_id": arbiter_ids[name]}
+        for case_id, (_, _, arbs) in zip(case_ids, items)
+        for name in arbs
+    ]
+    if tag_links:
+        db.session.execute(case_tags.insert(), tag_links)
+    if arbiter_links:
+        db.session.execute(case_arbiters.insert(), arbiter_links)
+
+    sync_case_fts(case_ids)
+    commit_local_write()
+
+    for case_id, row in zip(case_ids, case_rows):
+        fuzzy_index.add(case_id, row["title_norm"], row["keywords_norm"], row["industry_norm"])
+    filter_index.add_cases(
+        (
+            case_id,
+            row.get("industry"),
+            row.get("fecha_laudo"),
+            [tag_ids[name] for name in tags],
+            [arbiter_ids[name] for name in arbs],
+        )
+        for case_id, row, (_, tags, arbs) in zip(case_ids, case_rows, items)
+    )
+    suggest_index.add_cases(
+        (case_id, row["radicado"], row["title"], row["industry"])
+        for case_id, row in zip(case_ids, case_rows)
+    )
+    suggest_index.add_names("tag", ((tag_id, name) for name, tag_id in tag_ids.items()))
+    suggest_index.add_names(
+        "arbiter", ((arbiter_id, name) for name, arbiter_id in arbiter_ids.items())
+    )
+    return case_ids
+
+
+def iter_bulk_payload():
+    """
+    (número de fila, caso, error) del cuerpo de /api/cases/bulk: NDJSON leído
+    línea por línea del stream, o un arreglo JSON. error es None o el mensaje
+    de una línea que no es JSON válido.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        # request.stream es un RawIOBase: sin buffer, readline() lee de a pocos bytes
+        lines = io.BufferedReader(request.stream, buffer_size=1 << 16)
+        for lineno, raw in enumerate(lines, start=1):
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                yield lineno, json.loads(line), None
+            except ValueError as exc:
+                yield lineno, None, f"JSON inválido: {exc}"
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("se espera NDJSON o un arreglo JSON de casos")
+    for row, item in enumerate(data, start=1):
+        yield row, item, None
 
 
 # --- Ruta de carga vía JSON ---------------------------------
@@ -983,63 +3990,40 @@ def create_case():
     """
     data = request.get_json(silent=True) or {}
 
-    radicado = (data.get("radicado") or "").strip()
-    title = (data.get("title") or "").strip()
-    content = (data.get("content") or "").strip()
-    doc_filename = (data.get("doc_filename") or data.get("path") or "").strip()
-    arbiter = (data.get("arbiter") or "").strip()
-    keywords = (data.get("keywords") or "").strip()
-    tags_in = data.get("tags") or []
-    fecha_laudo_str = (data.get("fecha_laudo") or "").strip()
-
-    if not radicado or not title or not content or not doc_filename:
-        return (
-            jsonify(
-                {
-                    "error": "radicado, title, content y path/doc_filename son obligatorios",
-                }
-            ),
-            400,
-        )
-
-    # Parsear fecha del laudo si viene
-    fecha_laudo = None
-    if fecha_laudo_str:
-        try:
-            fecha_laudo = datetime.strptime(fecha_laudo_str, "%Y-%m-%d").date()
-        except ValueError:
-            return jsonify({"error": "fecha_laudo debe tener formato YYYY-MM-DD"}), 400
+    try:
+        fields, tag_names = parse_case_payload(data)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    # Como antes, este endpoint no registra la industria
+    fields.pop("industry")
 
-    if not isinstance(tags_in, list):
-        return jsonify({"error": "tags debe ser una lista de nombres de etiqueta"}), 400
+    if db.session.scalar(select(Case.id).where(Case.radicado == fields["radicado"])):
+        return jsonify({"error": f"ya existe un caso con radicado {fields['radicado']}"}), 409
 
     tag_objects = []
-    for raw_name in tags_in:
-        if not isinstance(raw_name, str):
-            continue
-        name = raw_name.strip()
-        if not name:
-            continue
-
+    for name in tag_names:
         tag = Tag.query.filter_by(name=name).first()
         if not tag:
             tag = Tag(name=name)
             db.session.add(tag)
         tag_objects.append(tag)
 
-    new_case = Case(
-        radicado=radicado,
-        fecha_laudo=fecha_laudo,
-        title=title,
-        content=content,
-        doc_filename=doc_filename,
-        arbiter=arbiter,
-        keywords=keywords,
-        tags=tag_objects,
-    )
+    new_case = Case(tags=tag_objects, **fields)
 
     db.session.add(new_case)
-    db.session.commit()
+    db.session.flush()
+    sync_case_fts([new_case.id])
+    commit_local_write()
+
+    fuzzy_index.add(
+        new_case.id, new_case.title_norm, new_case.keywords_norm, new_case.industry_norm
+    )
+    filter_index.add_cases(
+        [(new_case.id, None, new_case.fecha_laudo, [tag.id for tag in tag_objects], ())]
+    )
+    suggest_index.add_cases([(new_case.id, new_case.radicado, new_case.title, None)])
+    suggest_index.add_names("tag", ((tag.id, tag.name) for tag in tag_objects))
+    bump_data_generation()
 
     return (
         jsonify(
@@ -1060,8 +4044,111 @@ def create_case():
     )
 
 
+@app.route("/api/cases/bulk", methods=["POST"])
+def create_cases_bulk():
+    """
+    Carga masiva de casos, con el mismo formato por caso que /api/cases
+    (más "industry"; "arbiter" se separa en árbitros como en init_db).
+
+    Acepta NDJSON (Content-Type: application/x-ndjson, un caso por línea,
+    leído en streaming) o un arreglo JSON. Los casos válidos se escriben en
+    transacciones de BULK_CHUNK_SIZE; los inválidos se reportan por fila:
+
+    {"received": 3, "inserted": 2, "errors": [{"row": 2, "error": "..."}]}
+    """
+    chunk_size = app.config["BULK_CHUNK_SIZE"]
+    received = inserted = 0
+    errors = []
+    chunk = []  # [(row, (campos, tags, arbiters))]
+    seen = set()  # radicados ya aceptados en esta carga
+
+    def flush():
+        nonlocal inserted
+        # radicado es único: los que ya están en la base se reportan por fila
+        taken = set(
+            db.session.scalars(
+                select(Case.radicado).where(
+                    Case.radicado.in_([fields["radicado"] for _, (fields, _, _) in chunk])
+                )
+            )
+        )
+        if taken:
+            errors.extend(
+                {"row": row, "error": f"ya existe un caso con radicado {fields['radicado']}"}
+                for row, (fields, _, _) in chunk
+                if fields["radicado"] in taken
+            )
+            chunk[:] = [entry for entry in chunk if entry[1][0]["radicado"] not in taken]
+        if not chunk:
+            return
+        try:
+            inserted += len(ingest_case_chunk([item for _, item in chunk]))
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            message = f"error al guardar el bloque: {exc.__class__.__name__}"
+            errors.extend({"row": row, "error": message} for row, _ in chunk)
+        chunk.clear()
+
+    try:
+        for row, data, error in iter_bulk_payload():
+            received += 1
+            if error is None:
+                try:
+                    fields, tag_names = parse_case_payload(data)
+                except ValueError as exc:
+                    error = str(exc)
+            if error is None and fields["radicado"] in seen:
+                error = f"radicado {fields['radicado']} repetido en la carga"
+            if error is not None:
+                errors.append({"row": row, "error": error})
+                continue
+
+            seen.add(fields["radicado"])
+            chunk.append((row, (fields, tag_names, parse_arbiter_names(fields["arbiter"]))))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    finally:
+        # Los bloques ya confirmados invalidan las cachés aunque algo falle después
+        if inserted:
+            bump_data_generation()
+
+    status = 201 if inserted else 400
+    return jsonify({"received": received, "inserted": inserted, "errors": errors}), status
+
+
 # --- Main ---------------------------------------------------
 
+def serve(host=None, port=None, threads=None):
+    """Servir la aplicación con waitress (ver SERVER_THREADS)."""
+    if waitress is None:
+        raise RuntimeError("Falta la dependencia opcional waitress (pip install waitress)")
+    waitress.serve(
+        app,
+        host=host or app.config["SERVER_HOST"],
+        port=port or app.config["SERVER_PORT"],
+        threads=threads or app.config["SERVER_THREADS"],
+        connection_limit=app.config["SERVER_CONNECTION_LIMIT"],
+    )
+
+
+@app.cli.command("serve")
+@click.option("--host", default=None, help="Dirección (por defecto, SERVER_HOST).")
+@click.option("--port", type=int, default=None, help="Puerto (por defecto, SERVER_PORT).")
+@click.option("--threads", type=int, default=None, help="Hilos de la aplicación (por defecto, SERVER_THREADS).")
+def serve_command(host, port, threads):
+    """Servir la aplicación en producción con waitress."""
+    os.makedirs(app.config["CASE_DOCS_DIR"], exist_ok=True)
+    init_db()
+    try:
+        serve(host, port, threads)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+
+
 if __name__ == "__main__":
     # Asegurar carpeta de documentos
     os.makedirs(app.config["CASE_DOCS_DIR"], exist_ok=True)
@@ -1070,5 +4157,10 @@ if __name__ == "__main__":
     with app.app_context():
         init_db()
 
-    # Escuchar en 0.0.0.0 para acceso desde red local
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Escuchar en 0.0.0.0 para acceso desde red local. El servidor de
+    # desarrollo (recarga y depurador) solo con FLASK_DEBUG=1 o sin waitress
+    debug = os.environ.get("FLASK_DEBUG") == "1"
+    if debug or waitress is None:
+        app.run(host=app.config["SERVER_HOST"], port=app.config["SERVER_PORT"], debug=debug)
+    else:
+        serve()
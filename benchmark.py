@@ -0,0 +1,376 @@
+"""
+Benchmark de búsqueda, descarga e ingesta sobre un corpus sintético.
+
+Genera casos a partir de los datos de ejemplo que siembra init_db (mismos
+textos, tags, árbitros e industrias, con radicados, fechas y títulos
+variados), en una base SQLite aparte, y recorre las rutas con el test
+client de Flask. Para cada tamaño de corpus reporta en JSON el throughput
+y las latencias p50/p95/p99 (ms) de cada escenario.
+
+Uso:
+    python benchmark.py --sizes 1000,10000 --requests 200 --output bench.json
+
+El corpus crece de un tamaño al siguiente (1k -> 10k -> ...), así que la
+ingesta de cada tramo también queda medida. Por defecto las cachés de
+búsqueda y de página están desactivadas para medir el camino completo;
+--with-cache las deja con la configuración normal.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import cycle
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000",
+        help="Tamaños de corpus separados por coma (p. ej. 1000,10000,100000,1000000)",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones por escenario")
+    parser.add_argument("--db", help="Archivo SQLite a usar (por defecto, uno temporal)")
+    parser.add_argument("--output", help="Archivo JSON de salida (por defecto, stdout)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--with-cache",
+        action="store_true",
+        help="Dejar activas las cachés de resultados y de página",
+    )
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# La URI se fija antes de importar app: Flask-SQLAlchemy crea el engine al importar
+db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+os.environ["CASES_DATABASE_URI"] = f"sqlite:///{os.path.abspath(db_path)}"
+
+from app import (  # noqa: E402
+    Arbiter,
+    Case,
+    SORT_KEYS,
+    Tag,
+    app,
+    bump_data_generation,
+    db,
+    encode_cursor,
+    ingest_case_chunk,
+    init_db,
+    parse_arbiter_names,
+)
+
+
+# --- Corpus sintético ---------------------------------------
+
+FIRST_NAMES = ["Ana", "Carlos", "Laura", "Jorge", "Diana", "Camilo", "Paula", "Luis",
+               "Andrea", "Felipe", "Juliana", "Ricardo", "Beatriz", "Santiago", "Marta"]
+LAST_NAMES = ["López", "Restrepo", "Vélez", "Ramírez", "Ruiz", "Salazar", "Hoyos",
+              "Nieto", "Pérez", "Martínez", "Torres", "Arango", "Mejía", "Cárdenas", "Gómez"]
+
+
+def load_templates():
+    """Casos sembrados por init_db, como plantillas para el generador."""
+    templates = []
+    for case in Case.query.order_by(Case.id):
+        templates.append(
+            {
+                "title": case.title,
+                "content": case.content,
+                "keywords": case.keywords or "",
+                "industry": case.industry,
+                "path": case.doc_filename,
+                "tags": [t.name for t in case.tags],
+            }
+        )
+    return templates
+
+
+class CorpusGenerator:
+    """Produce casos con la forma de los datos de ejemplo."""
+
+    def __init__(self, templates, rng):
+        self.templates = templates
+        self.rng = rng
+        self.title_words = sorted({w for t in templates for w in t["title"].split() if len(w) > 3})
+        base_tags = sorted({name for t in templates for name in t["tags"]})
+        # Cola larga de tags: los reales más variantes por sufijo
+        self.tags = base_tags + [f"{name}_{i}" for name in base_tags for i in range(1, 6)]
+        self.people = [f"{f} {l}" for f in FIRST_NAMES for l in LAST_NAMES]
+        self.counter = 0
+
+    def case(self):
+        rng = self.rng
+        template = rng.choice(self.templates)
+        self.counter += 1
+        year = rng.randint(2015, 2025)
+        fecha = date(year, 1, 1) + timedelta(days=rng.randint(0, 364))
+        parties = rng.sample(self.title_words, 4)
+        if rng.random() < 0.5:
+            arbiter = f"Árbitro único: {rng.choice(self.people)}"
+        else:
+            arbiter = "Tribunal: " + ", ".join(rng.sample(self.people, 3))
+        return {
+            "radicado": f"{year} A {self.counter:07d}",
+            "fecha_laudo": fecha,
+            "title": f"{parties[0]} {parties[1]} vs. {parties[2]} {parties[3]}",
+            "content": template["content"],
+            "doc_filename": template["path"],
+            "arbiter": arbiter,
+            "keywords": template["keywords"],
+            "industry": template["industry"],
+            "tags": rng.sample(template["tags"], min(4, len(template["tags"])))
+            + rng.sample(self.tags, 3),
+        }
+
+    def grow_to(self, size, chunk_size=1000):
+        """Agregar casos hasta que el corpus tenga `size`; devuelve stats de ingesta."""
+        missing = size - Case.query.count()
+        start = time.perf_counter()
+        inserted = 0
+        while inserted < missing:
+            items = []
+            for _ in range(min(chunk_size, missing - inserted)):
+                data = self.case()
+                tags = list(dict.fromkeys(data.pop("tags")))
+                items.append((data, tags, parse_arbiter_names(data["arbiter"])))
+            ingest_case_chunk(items)
+            inserted += len(items)
+        bump_data_generation()
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": inserted,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(inserted / elapsed, 1) if elapsed else None,
+        }
+
+
+# --- Escenarios ---------------------------------------------
+
+# Aparecen en el contenido de todos los casos de ejemplo
+BROAD_TERMS = ["tribunal", "laudo"]
+
+
+def typo(text, rng):
+    """Una errata por palabra larga: borrar, duplicar o cambiar una letra."""
+    words = []
+    for word in text.split():
+        if len(word) > 4 and rng.random() < 0.6:
+            i = rng.randrange(1, len(word) - 1)
+            op = rng.choice(("drop", "dup", "swap"))
+            if op == "drop":
+                word = word[:i] + word[i + 1:]
+            elif op == "dup":
+                word = word[:i] + word[i] + word[i:]
+            else:
+                word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+        words.append(word)
+    return " ".join(words)
+
+
+def sample_cases(rng, n):
+    total = Case.query.count()
+    ids = [rng.randint(1, total) for _ in range(n)]
+    rows = Case.query.with_entities(Case.id, Case.radicado, Case.title).filter(Case.id.in_(ids))
+    return list(rows)
+
+
+def deep_cursor(sort, depth):
+    """Cursor after= que apunta a la fila `depth` del orden `sort`."""
+    key = SORT_KEYS[sort]
+    column = key.column.desc() if key.descending else key.column.asc()
+    id_order = Case.id.desc() if key.descending else Case.id.asc()
+    case = Case.query.order_by(column, id_order).offset(depth).first()
+    return encode_cursor(key, case) if case else None
+
+
+def build_scenarios(rng, n):
+    """{nombre: [(método, url, kwargs)]} con n peticiones por escenario."""
+    sample = sample_cases(rng, n)
+    tag_ids = [t.id for t in Tag.query.with_entities(Tag.id)]
+    arbiter_ids = [a.id for a in Arbiter.query.with_entities(Arbiter.id)]
+    industries = sorted({row[0] for row in db.session.query(Case.industry).distinct() if row[0]})
+    total = Case.query.count()
+
+    def facet_url():
+        parts = [f"tag={t}" for t in rng.sample(tag_ids, 2)]
+        parts.append(f"arbiter={rng.choice(arbiter_ids)}")
+        parts.append(f"industry={rng.choice(industries)}")
+        parts.append(f"date_from={rng.randint(2015, 2022)}-01-01")
+        return "/?" + "&".join(parts)
+
+    # (sort, cursor): el cursor solo vale para el orden con el que se armó
+    deep = []
+    for _ in range(min(n, 20)):
+        sort = rng.choice(list(SORT_KEYS))
+        cursor = deep_cursor(sort, int(total * rng.uniform(0.5, 0.99)))
+        if cursor:
+            deep.append((sort, cursor))
+    create_payloads = [
+        {
+            "radicado": f"BENCH {total}-{i:07d}",
+            "fecha_laudo": "2024-06-30",
+            "title": typo(c.title, rng),
+            # Términos de todas las plantillas: broad_term sigue cubriendo el corpus
+            "content": "Laudo del tribunal, caso creado por el benchmark.",
+            "path": "2024 A 0052 30-04-2025.pdf",
+            "tags": ["pacto_arbitral", "benchmark"],
+        }
+        for i, c in enumerate(sample)
+    ]
+
+    # Escritura seguida de la búsqueda del caso recién creado: mide el
+    # camino de invalidación (índices en memoria y cachés con --with-cache)
+    # y cuenta como error que la búsqueda no lo encuentre
+    write_then_search = []
+    for i, payload in enumerate(create_payloads[: n // 2 or 1]):
+        radicado = f"{rng.randint(2015, 2025)} A W{total}{i:06d}"
+        write_then_search.append(
+            ("post", "/api/cases", {"json": dict(payload, radicado=radicado)})
+        )
+        write_then_search.append(
+            (
+                "get",
+                "/api/search",
+                {"query_string": {"q": radicado, "limit": 10}},
+                lambda response, radicado=radicado: any(
+                    r.get("radicado") == radicado for r in response.get_json()["results"]
+                ),
+            )
+        )
+
+    return {
+        "landing": [("get", "/", {})] * n,
+        # Radicados "2019 A 0000123": el token de una letra "A" está en casi todo el corpus
+        "exact_radicado": [("get", "/", {"query_string": {"q": c.radicado}}) for c in sample],
+        "radicado_year_a": [
+            ("get", "/", {"query_string": {"q": f"{rng.randint(2015, 2025)} A"}})
+            for _ in range(n)
+        ],
+        "fuzzy_typo_title": [
+            ("get", "/", {"query_string": {"q": typo(c.title, rng)}}) for c in sample
+        ],
+        # q que coincide con todo el corpus (ids explícitos sin ningún filtro)
+        "broad_term": [
+            ("get", "/" if i % 2 else "/api/search", {"query_string": {"q": term}})
+            for i, term in zip(range(n), cycle(BROAD_TERMS))
+        ],
+        "multi_facet": [("get", facet_url(), {}) for _ in range(n)],
+        "deep_page": [
+            ("get", "/", {"query_string": {"sort": sort, "after": cursor}})
+            for sort, cursor in (rng.choice(deep) for _ in range(n))
+        ] if deep else [],
+        "api_search": [
+            ("get", "/api/search", {"query_string": {"q": typo(c.title, rng), "limit": 10}})
+            for c in sample
+        ],
+        "download_full": [("get", f"/cases/{c.id}/download", {}) for c in sample],
+        "download_range": [
+            ("get", f"/cases/{c.id}/download", {"headers": {"Range": "bytes=0-65535"}})
+            for c in sample
+        ],
+        "create_case": [("post", "/api/cases", {"json": p}) for p in create_payloads],
+        "write_then_search": write_then_search,
+    }
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_scenario(client, requests):
+    """
+    Ejecutar (método, url, kwargs[, check]) en orden. check(response) es
+    opcional: si devuelve False la petición cuenta como error.
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for method, url, kwargs, *check in requests:
+        t0 = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        response.get_data()  # consumir el cuerpo (los PDF se envían en streaming)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if response.status_code >= 400 or (check and not check[0](response)):
+            errors += 1
+        response.close()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+    }
+
+
+def main():
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    if not args.with_cache:
+        app.config["SEARCH_CACHE_SIZE"] = 0
+        app.config["PAGE_CACHE_SIZE"] = 0
+
+    report = {
+        "database": db_path,
+        "cache": args.with_cache,
+        "requests_per_scenario": args.requests,
+        "runs": [],
+    }
+    with app.app_context():
+        init_db()
+        generator = CorpusGenerator(load_templates(), rng)
+        client = app.test_client()
+
+        for size in sorted(sizes):
+            print(f"corpus {size}...", file=sys.stderr)
+            run = {"size": size, "ingest": generator.grow_to(size), "scenarios": {}}
+            # Primera búsqueda: construye índices en memoria (fuzzy, bitmaps)
+            t0 = time.perf_counter()
+            client.get("/?q=contrato")
+            run["warmup_seconds"] = round(time.perf_counter() - t0, 3)
+
+            for name, requests in build_scenarios(rng, args.requests).items():
+                print(f"  {name}", file=sys.stderr)
+                run["scenarios"][name] = run_scenario(client, requests)
+            # Los casos de create_case y write_then_search cuentan para el tamaño siguiente
+            report["runs"].append(run)
+
+    failed = [
+        f"{run['size']}/{name}"
+        for run in report["runs"]
+        for name, stats in run["scenarios"].items()
+        if stats["errors"]
+    ]
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+    if failed:
+        print(f"escenarios con errores: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()